@@ -6,27 +6,74 @@
 ##############################################################################
 
 
+import argparse
+import cProfile
+import os
+import pstats
+import sys
+
+import ex11_utils
+from boggle_board_randomizer import BOARD_SIZE, MAX_BOARD_SIZE, MIN_BOARD_SIZE
 from boogle_gui import BoggleGui
 from boggle_menu import BoggleMenu
 
+# set to a file name for saving a cProfile profile of the whole game there
+PROFILE_ENV_VAR = "BOGGLE_PROFILE"
+
 
 class BoggleGame:
     """BoggleGame class responsible to connect all the external elements
     to a complete boggle game !"""
 
-    def __init__(self):
+    def __init__(self, board_size=BOARD_SIZE):
         self.boggle_gui = None  # initialize to None
+        self.board_size = board_size
 
     def start(self):
         # starts the boggle game
-        self.boggle_gui = BoggleGui()
+        self.boggle_gui = BoggleGui(self.board_size)
         self.boggle_gui.set_title("Boggle Game")
         self.boggle_gui.run()
 
 
-if __name__ == "__main__":
-    boggle_game = BoggleGame()
+def run_profiled(func, path):
+    """Runs func under cProfile and saves the profile to path, together
+    with the profile of the solver (which runs on a thread of its own).
+    since python 3.12 the profiler sees every thread, so the solver
+    doesn't need a profiler of its own."""
+    main_profiler = cProfile.Profile()
+    solver_profiler = cProfile.Profile()
+    if not hasattr(sys, "monitoring"):
+        ex11_utils.set_solver_profiler(solver_profiler)
+    try:
+        main_profiler.runcall(func)
+    finally:
+        ex11_utils.set_solver_profiler(None)
+        stats = pstats.Stats(main_profiler)
+        # the solver profile is empty if no board was solved
+        if solver_profiler.getstats():
+            stats.add(solver_profiler)
+        stats.dump_stats(path)
+        print(f"profile saved to {path}")
+
+
+def main(board_size=BOARD_SIZE):
+    boggle_game = BoggleGame(board_size)
     # passing the start method to the boggle menu
     # for starting the game window
     boggle_menu = BoggleMenu(boggle_game.start)
     boggle_menu.run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play boggle")
+    parser.add_argument("--size", type=int, default=BOARD_SIZE,
+                        choices=range(MIN_BOARD_SIZE, MAX_BOARD_SIZE + 1),
+                        metavar=f"{MIN_BOARD_SIZE}-{MAX_BOARD_SIZE}",
+                        help="number of rows and columns of the board")
+    args = parser.parse_args()
+    profile_path = os.environ.get(PROFILE_ENV_VAR)
+    if profile_path:
+        run_profiled(lambda: main(args.size), profile_path)
+    else:
+        main(args.size)
@@ -0,0 +1,238 @@
+##############################################################################
+# FILE: boggle_benchmark.py
+# EXERCISE: Intro2cs ex11 2023-2024
+# WRITER: LiorHaleli and ElianaPetel
+# DESCRIPTION: Benchmarks of the solver, the dictionary and the board
+#              generator over a fixed seeded corpus of boards
+##############################################################################
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+import boggle_dictionary
+import ex11_utils
+from boggle_board_generator import BoardGenerator
+from boggle_board_randomizer import MAX_BOARD_SIZE, MIN_BOARD_SIZE
+from ex11_utils import Board, Path
+
+CORPUS_SEED = 2023
+DEFAULT_BOARDS = 40
+DEFAULT_REPEAT = 3
+# a benchmark is a regression when it is this much slower than the baseline
+DEFAULT_THRESHOLD = 1.3
+
+
+def best_time(func: Callable[[], Any], repeat: int) -> float:
+    """Returns the fastest of repeat runs of func, in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(func: Callable[[], Any]) -> int:
+    """Returns the peak of python memory allocated while func runs, in bytes.
+    (memory mapped files are not python allocations, and are not counted)"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def corpus_boards(count: int, seed: int = CORPUS_SEED) -> List[Board]:
+    return list(BoardGenerator(seed).boards(count))
+
+
+def corpus_paths(boards: List[Board], words, seed: int = CORPUS_SEED) -> List[List[Path]]:
+    """For every board: the paths of its words and as many random walks,
+    which are mostly not words and often not even legal paths"""
+    rng = random.Random(seed)
+    all_paths = []
+    for board in boards:
+        paths = ex11_utils.max_score_paths(board, words)
+        for _ in range(len(paths)):
+            path = [(rng.randrange(len(board)), rng.randrange(len(board[0])))]
+            for _ in range(rng.randint(2, 7)):
+                y, x = path[-1]
+                path.append((y + rng.randint(-1, 1), x + rng.randint(-1, 1)))
+            paths.append(path)
+        all_paths.append(paths)
+    return all_paths
+
+
+def corpus_lookups(index: ex11_utils.PrefixIndex, count: int = 2000,
+                   seed: int = CORPUS_SEED) -> List[str]:
+    """count words of the dictionary, and each one with its last letter
+    changed, which is mostly not a word"""
+    rng = random.Random(seed)
+    lookups = []
+    for word in rng.sample(index.words, count):
+        lookups.append(word)
+        lookups.append(word[:-1] + rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+    return lookups
+
+
+def run_benchmarks(boards_count: int = DEFAULT_BOARDS,
+                   repeat: int = DEFAULT_REPEAT) -> Dict[str, Any]:
+    """Runs every benchmark and returns the json-ready results. Every result
+    has the best time in seconds and the time of a single operation in
+    microseconds ("per_op_us"), which is what baselines are compared on."""
+    results: Dict[str, Dict[str, Any]] = {}
+
+    def record(name, seconds, ops, **extra):
+        results[name] = dict(seconds=seconds, ops=ops,
+                             per_op_us=seconds / ops * 1e6, **extra)
+
+    text_path = boggle_dictionary.DICT_PATH
+    words = set(boggle_dictionary.read_text_dictionary(text_path))
+    record("dict_load_text",
+           best_time(lambda: set(boggle_dictionary.read_text_dictionary(text_path)),
+                     repeat), 1,
+           peak_bytes=peak_memory(
+               lambda: set(boggle_dictionary.read_text_dictionary(text_path))))
+    boggle_dictionary.load_dictionary()  # builds the packed file if needed
+    # loading only maps the file, the lookups below are what it costs
+    record("dict_load_packed",
+           best_time(boggle_dictionary.load_dictionary, repeat), 1,
+           peak_bytes=peak_memory(boggle_dictionary.load_dictionary))
+    record("prefix_index_build",
+           best_time(lambda: ex11_utils.PrefixIndex(words), repeat), 1)
+
+    boards = corpus_boards(boards_count)
+    index = ex11_utils.PrefixIndex(words)
+    # the game solves on the memory mapped dictionary, so its lookups and
+    # solves are measured too, and not only the ones of the index in memory
+    packed = boggle_dictionary.load_dictionary()
+    lookups = corpus_lookups(index)
+    record("dict_lookup", best_time(
+        lambda: [word in index for word in lookups], repeat), len(lookups))
+    record("dict_lookup_packed", best_time(
+        lambda: [word in packed for word in lookups], repeat), len(lookups))
+    paths = corpus_paths(boards, index)
+    paths_count = sum(map(len, paths))
+
+    def check_paths():
+        for board, board_paths in zip(boards, paths):
+            for path in board_paths:
+                ex11_utils.is_valid_path(board, path, words)
+
+    record("is_valid_path", best_time(check_paths, repeat), paths_count)
+    record("validate_paths", best_time(
+        lambda: [ex11_utils.validate_paths(board, board_paths, words)
+                 for board, board_paths in zip(boards, paths)], repeat),
+        paths_count)
+
+    for n in range(3, 11):
+        record(f"find_length_n_words_{n}", best_time(
+            lambda: [ex11_utils.find_length_n_words(n, board, index)
+                     for board in boards], repeat), len(boards))
+    record("max_score_paths", best_time(
+        lambda: [ex11_utils.max_score_paths(board, index) for board in boards],
+        repeat), len(boards))
+    record("solve_board", best_time(
+        lambda: [ex11_utils.solve_board(board, index) for board in boards],
+        repeat), len(boards))
+    record("max_score_paths_packed", best_time(
+        lambda: [ex11_utils.max_score_paths(board, packed) for board in boards],
+        repeat), len(boards))
+    record("solve_board_packed", best_time(
+        lambda: [ex11_utils.solve_board(board, packed) for board in boards],
+        repeat), len(boards))
+    # bigger boards, with fewer of them since each one takes longer
+    for size in range(MIN_BOARD_SIZE + 1, MAX_BOARD_SIZE + 1):
+        sized_boards = list(BoardGenerator(CORPUS_SEED, size).boards(
+            max(1, boards_count // size)))
+        record(f"solve_board_{size}x{size}", best_time(
+            lambda: [ex11_utils.solve_board(board, index)
+                     for board in sized_boards], repeat), len(sized_boards))
+        # only the biggest boards on the packed dictionary too, all of them
+        # would make the benchmarks much longer for the same code
+        if size == MAX_BOARD_SIZE:
+            record(f"solve_board_{size}x{size}_packed", best_time(
+                lambda: [ex11_utils.solve_board(board, packed)
+                         for board in sized_boards], repeat),
+                len(sized_boards))
+
+    generated = 20000
+    record("board_generation", best_time(
+        lambda: list(BoardGenerator(CORPUS_SEED).boards(generated)), repeat),
+        generated)
+    record("board_generation_codes", best_time(
+        lambda: BoardGenerator(CORPUS_SEED).codes(generated), repeat),
+        generated)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "corpus_seed": CORPUS_SEED,
+            "boards": boards_count,
+            "paths": paths_count,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any],
+            threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """Returns a line for every benchmark that got slower than the baseline
+    by more than the threshold ratio"""
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        ratio = result["per_op_us"] / base["per_op_us"]
+        if ratio > threshold:
+            regressions.append(
+                f"{name}: {result['per_op_us']:.2f}us per op, "
+                f"{ratio:.2f}x the baseline {base['per_op_us']:.2f}us")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the boggle solver, dictionary and generator")
+    parser.add_argument("--boards", type=int, default=DEFAULT_BOARDS,
+                        help="number of boards in the seeded corpus")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="runs of every benchmark, the fastest is kept")
+    parser.add_argument("--output", help="write the results json to this file")
+    parser.add_argument("--baseline", help="results json to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown ratio that counts as a regression")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.boards, args.repeat)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print("REGRESSION " + line, file=sys.stderr)
+        if regressions:
+            return 1
+        print("no regressions against " + args.baseline, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+##############################################################################
+# FILE: boggle_board_canvas.py
+# EXERCISE: Intro2cs ex11 2023-2024
+# WRITER: LiorHaleli and ElianaPetel
+# DESCRIPTION: The game board drawn on a single canvas
+##############################################################################
+
+from tkinter import Canvas
+from typing import Callable, Dict, List, Optional, Tuple
+
+import ex11_utils
+from boggle_board_randomizer import BOARD_SIZE
+from ex11_utils import Board
+
+Cell = Tuple[int, int]
+
+
+class BoardCanvas:
+    """The board as tiles (a rectangle and a letter) on one Canvas.
+    Clicks and drags are turned into cells by their coordinates, and the
+    tiles are made once and only get new letters and colors after that,
+    so the same canvas is used for every game."""
+
+    def __init__(self, parent, on_press: Callable[[Cell], None],
+                 on_drag: Callable[[Cell], None]):
+        """
+        :param parent: the widget the canvas is in.
+        :param on_press: called with the cell the mouse was pressed on.
+        :param on_drag: called with every new cell the mouse is dragged
+                        into while pressed.
+        """
+        self.canvas = Canvas(parent, bg=ex11_utils.VERY_DARK_GREEN,
+                             highlightthickness=0)
+        self.on_press = on_press
+        self.on_drag = on_drag
+        self.rows = self.cols = 0
+        self.tile = self.gap = 0
+        self.tiles: List[List[int]] = []
+        self.letters: List[List[int]] = []
+        self.colors: Dict[Cell, str] = {}  # the color each tile was last painted
+        self._drag_cell: Optional[Cell] = None
+        self.canvas.bind("<Button-1>", self._pressed)
+        self.canvas.bind("<B1-Motion>", self._dragged)
+
+    def show_board(self, board: Board) -> None:
+        """Shows the board's letters on white tiles. the tiles are only
+        made again if the board has another size than the last one."""
+        rows, cols = len(board), len(board[0])
+        if (rows, cols) != (self.rows, self.cols):
+            self._make_tiles(rows, cols)
+        for row in range(rows):
+            for col in range(cols):
+                self.canvas.itemconfigure(self.letters[row][col],
+                                          text=board[row][col])
+                self.set_cell_color((row, col), "white")
+
+    def _make_tiles(self, rows: int, cols: int) -> None:
+        self.canvas.delete("all")
+        self.rows, self.cols = rows, cols
+        # bigger boards get smaller tiles, so they fit in the same window
+        shrink = max(rows, cols) - BOARD_SIZE
+        self.tile = max(30, 64 - 5 * shrink)
+        self.gap = 10 if shrink <= 1 else 4
+        font_size = max(9, 16 - shrink)
+        step = self.tile + self.gap
+        self.canvas.config(width=cols * step + self.gap,
+                           height=rows * step + self.gap)
+        self.tiles, self.letters, self.colors = [], [], {}
+        for row in range(rows):
+            tile_row, letter_row = [], []
+            for col in range(cols):
+                x = self.gap + col * step
+                y = self.gap + row * step
+                tile_row.append(self.canvas.create_rectangle(
+                    x, y, x + self.tile, y + self.tile,
+                    fill="white", outline=ex11_utils.DARK_GREEN, width=2))
+                letter_row.append(self.canvas.create_text(
+                    x + self.tile / 2, y + self.tile / 2, text="",
+                    font=("Comic Sans MS", font_size),
+                    fill=ex11_utils.VERY_DARK_GREEN))
+                self.colors[(row, col)] = "white"
+            self.tiles.append(tile_row)
+            self.letters.append(letter_row)
+
+    def set_cell_color(self, cell: Cell, color: str) -> None:
+        # paints the tile only if it is not that color already,
+        # so Tk is only asked to redraw the tiles that really changed
+        if self.colors.get(cell) != color:
+            row, col = cell
+            self.canvas.itemconfigure(self.tiles[row][col], fill=color)
+            self.colors[cell] = color
+
+    def cell_at(self, x: int, y: int, inset: int = 0) -> Optional[Cell]:
+        """The cell of the tile at the canvas point (x, y), or None if the
+        point is between tiles or off the board. with an inset, the point
+        must also be that far inside the tile."""
+        step = self.tile + self.gap
+        col, x_in_tile = divmod(x - self.gap, step)
+        row, y_in_tile = divmod(y - self.gap, step)
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            return None
+        if not (inset <= x_in_tile < self.tile - inset
+                and inset <= y_in_tile < self.tile - inset):
+            return None
+        return int(row), int(col)
+
+    def _pressed(self, event) -> None:
+        self._drag_cell = self.cell_at(event.x, event.y)
+        if self._drag_cell is not None:
+            self.on_press(self._drag_cell)
+
+    def _dragged(self, event) -> None:
+        # only the middle of a tile counts while dragging, so a diagonal
+        # drag doesn't pass through the corners of the tiles next to it
+        cell = self.cell_at(event.x, event.y, inset=self.tile // 5)
+        if cell is not None and cell != self._drag_cell:
+            self._drag_cell = cell
+            self.on_drag(cell)
@@ -0,0 +1,308 @@
+##############################################################################
+# FILE: boggle_board_generator.py
+# EXERCISE: Intro2cs ex11 2023-2024
+# WRITER: LiorHaleli and ElianaPetel
+# DESCRIPTION: Seeded generator for reproducible batches of boards
+##############################################################################
+
+import random
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from boggle_board_randomizer import BOARD_SIZE, dice_for_size
+from ex11_utils import Board, PrefixIndex, get_prefix_index, search_board
+
+VOWELS = {"A", "E", "I", "O", "U", "QU"}
+
+
+def encode_board(board: Board) -> bytes:
+    """Compact form of a board: one ascii byte per cell, row by row,
+    where a QU cell is written as a single Q"""
+    return "".join(cell[0] for row in board for cell in row).encode("ascii")
+
+
+def decode_board(code: bytes, cols: int) -> Board:
+    """Turns the compact form of a board with cols columns back into a board"""
+    cells = ["QU" if letter == "Q" else letter for letter in code.decode("ascii")]
+    return [cells[i:i + cols] for i in range(0, len(cells), cols)]
+
+
+class BoardGenerator:
+    """Generates boards by rolling dice, from its own random generator.
+    Two generators made with the same seed, size and dice give exactly the
+    same boards, in the same order, in both the list and compact forms."""
+
+    def __init__(self, seed: Optional[int] = None, size: int = BOARD_SIZE,
+                 dice: Optional[List[List[str]]] = None,
+                 rng: Optional[random.Random] = None):
+        """
+        :param seed: seed of the random generator, ignored if rng is given.
+        :param size: number of rows and columns of the boards.
+        :param dice: the dice to roll, at least size * size of them
+                     (the dice of dice_for_size(size) if not given).
+        :param rng: random.Random to use instead of a seeded new one.
+        """
+        if dice is None:
+            dice = dice_for_size(size)
+        if size * size > len(dice):
+            raise ValueError(f"{len(dice)} dice can't fill a {size}x{size} board")
+        self.rng = rng if rng is not None else random.Random(seed)
+        self.size = size
+        self.dice = [tuple(die) for die in dice]
+
+    def roll(self) -> List[str]:
+        """Rolls the dice of one board, returning its cells row by row"""
+        rand = self.rng.random
+        # random dice in random places, each one showing a random face
+        dice = self.rng.sample(self.dice, self.size * self.size)
+        return [die[int(rand() * len(die))] for die in dice]
+
+    def board(self) -> Board:
+        cells = self.roll()
+        size = self.size
+        return [cells[i:i + size] for i in range(0, len(cells), size)]
+
+    def boards(self, count: int) -> Iterator[Board]:
+        for _ in range(count):
+            yield self.board()
+
+    def codes(self, count: int) -> bytes:
+        """Generates count boards in their compact form (see encode_board),
+        joined together: board i is code[i * size * size:(i + 1) * size * size]"""
+        return b"".join(
+            "".join(cell[0] for cell in self.roll()).encode("ascii")
+            for _ in range(count)
+        )
+
+
+def generate_boards(count: int, seed: Optional[int] = None,
+                    size: int = BOARD_SIZE,
+                    dice: Optional[List[List[str]]] = None) -> List[Board]:
+    """Returns count boards of a new generator with the given seed"""
+    return list(BoardGenerator(seed, size, dice).boards(count))
+
+
+class GenerationStats:
+    """Counts of what happened to the boards a QualityFilter looked at"""
+
+    def __init__(self):
+        self.generated = 0
+        self.prefilter_rejected = 0  # rejected by vowels or candidate words
+        self.solver_rejected = 0  # solved and found outside the targets
+        self.accepted = 0
+        self.solve_seconds = 0.0
+
+    @property
+    def acceptance_rate(self) -> float:
+        return self.accepted / self.generated if self.generated else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "generated": self.generated,
+            "prefilter_rejected": self.prefilter_rejected,
+            "solver_rejected": self.solver_rejected,
+            "accepted": self.accepted,
+            "acceptance_rate": self.acceptance_rate,
+            "solve_seconds": self.solve_seconds,
+        }
+
+    def __str__(self):
+        return (f"generated {self.generated}, accepted {self.accepted} "
+                f"({self.acceptance_rate:.1%}), rejected by prefilter "
+                f"{self.prefilter_rejected}, by solver {self.solver_rejected}, "
+                f"{self.solve_seconds:.2f}s solving")
+
+
+class _TargetsSettled(Exception):
+    # stops the search once the board can no longer change its verdict
+    pass
+
+
+class QualityFilter:
+    """Decides whether a board is good enough to play: how many words it has,
+    the highest score on it and how many long words it has must all be in
+    their target ranges (None for no limit on that side).
+    Boards are first checked by their number of vowels, which costs nothing.
+    With a LetterCountMatrix of the words, they are then checked by their
+    candidate words (the words they have the letters for): every word on
+    the board is a candidate, so too few candidates, or too little score
+    or too few long words in them, rejects the board without solving it.
+    Only the boards that pass are solved, and only for their candidates."""
+
+    def __init__(self, words: Iterable[str],
+                 min_words: int = 0, max_words: Optional[int] = None,
+                 min_score: int = 0, max_score: Optional[int] = None,
+                 long_word_length: int = 7, min_long_words: int = 0,
+                 min_vowels: int = 0, max_vowels: Optional[int] = None,
+                 letter_counts=None):
+        """
+        :param letter_counts: boggle_dictionary.LetterCountMatrix of the
+                              same words, for checking boards in batches by
+                              their candidate words (optional, needs numpy).
+        """
+        self.index = get_prefix_index(words)
+        self.letter_counts = letter_counts
+        self.min_words, self.max_words = min_words, max_words
+        self.min_score, self.max_score = min_score, max_score
+        self.long_word_length = long_word_length
+        self.min_long_words = min_long_words
+        self.min_vowels, self.max_vowels = min_vowels, max_vowels
+        self.stats = GenerationStats()
+
+    def passes_prefilter(self, board: Board) -> bool:
+        vowels = sum(cell in VOWELS for row in board for cell in row)
+        return (vowels >= self.min_vowels
+                and (self.max_vowels is None or vowels <= self.max_vowels))
+
+    def candidate_indexes(self, boards: List[Board]) -> List[Optional[PrefixIndex]]:
+        """For every board, the prefix index of its candidate words, or None
+        if its candidates already can't reach the minimum targets"""
+        matrix = self.letter_counts
+        indexes: List[Optional[PrefixIndex]] = []
+        for word_ids in matrix.candidate_ids(boards):
+            lengths = matrix.lengths[word_ids].astype(int)
+            if not self.reaches_minimums(
+                    len(word_ids), int((lengths ** 2).sum()),
+                    int((lengths >= self.long_word_length).sum())):
+                indexes.append(None)
+            else:
+                indexes.append(matrix.index_of(word_ids))
+        return indexes
+
+    def passes_solver(self, board: Board,
+                      index: Optional[PrefixIndex] = None) -> bool:
+        """Solves the board (with the given index of its words, or all the
+        words) only as far as needed to know if it meets the targets"""
+        found: Set[str] = set()
+        totals = [0, 0]  # score, long words
+        only_minimums = self.max_words is None and self.max_score is None
+
+        def on_word(word, path):
+            if word in found:
+                return
+            found.add(word)
+            totals[0] += len(word) ** 2
+            totals[1] += len(word) >= self.long_word_length
+            # a maximum that is passed rejects the board, and with no
+            # maximums at all, reaching every minimum accepts it
+            if (self.max_words is not None and len(found) > self.max_words
+                    or self.max_score is not None and totals[0] > self.max_score
+                    or only_minimums and self.reaches_minimums(len(found), *totals)):
+                raise _TargetsSettled
+
+        try:
+            search_board(board, index if index is not None else self.index,
+                         on_word)
+        except _TargetsSettled:
+            pass
+        return (self.reaches_minimums(len(found), *totals)
+                and (self.max_words is None or len(found) <= self.max_words)
+                and (self.max_score is None or totals[0] <= self.max_score))
+
+    def reaches_minimums(self, words: int, score: int, long_words: int) -> bool:
+        return (words >= self.min_words and score >= self.min_score
+                and long_words >= self.min_long_words)
+
+    def accepts(self, board: Board) -> bool:
+        """Checks a board against the targets and counts the result in stats"""
+        return self.accepts_batch([board])[0]
+
+    def accepts_batch(self, boards: List[Board],
+                      limit: Optional[int] = None) -> List[bool]:
+        """accepts of every board, with the candidate words of all the
+        boards that pass the vowels check found together.
+        :param limit: if given, the boards after the limit-th accepted one
+                      are not checked: they are False and are not counted in
+                      stats, so the stats are only of the boards that count.
+        """
+        passes = [self.passes_prefilter(board) for board in boards]
+        checked = [board for board, passed in zip(boards, passes) if passed]
+        if self.letter_counts is not None and checked:
+            indexes = iter(self.candidate_indexes(checked))
+        else:
+            indexes = iter([self.index] * len(checked))
+        results = [False] * len(boards)
+        accepted = 0
+        for i, passed in enumerate(passes):
+            if limit is not None and accepted >= limit:
+                break
+            self.stats.generated += 1
+            index = next(indexes) if passed else None
+            if index is None:
+                self.stats.prefilter_rejected += 1
+                continue
+            start = time.perf_counter()
+            results[i] = self.passes_solver(boards[i], index)
+            self.stats.solve_seconds += time.perf_counter() - start
+            if results[i]:
+                accepted += 1
+                self.stats.accepted += 1
+            else:
+                self.stats.solver_rejected += 1
+        return results
+
+
+def generate_quality_boards(generator: BoardGenerator, quality: QualityFilter,
+                            count: int, max_tries: Optional[int] = None,
+                            batch_size: int = 64) -> Iterator[Board]:
+    """Yields count boards of the generator that the quality filter accepts.
+    boards are generated and checked batch_size at a time.
+    stops early after max_tries boards were generated, if it is given."""
+    accepted = 0
+    tries = 0
+    while accepted < count and (max_tries is None or tries < max_tries):
+        size = batch_size if max_tries is None else min(batch_size,
+                                                        max_tries - tries)
+        boards = list(generator.boards(size))
+        tries += size
+        # the last batch stops at the boards still needed, so the stats
+        # don't count boards that are accepted and then thrown away
+        for board, passed in zip(boards, quality.accepts_batch(
+                boards, limit=count - accepted)):
+            if passed:
+                accepted += 1
+                yield board
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(
+        description="Write seeded random boards, one per line. With any of "
+                    "the target options only boards that meet them are written "
+                    "and the rejection stats go to stderr.")
+    parser.add_argument("count", type=int)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--size", type=int, default=BOARD_SIZE)
+    targets = parser.add_argument_group("targets")
+    for name in ("min-words", "max-words", "min-score", "max-score",
+                 "min-long-words", "min-vowels", "max-vowels"):
+        targets.add_argument("--" + name, type=int, default=None)
+    targets.add_argument("--long-word-length", type=int, default=7)
+    args = parser.parse_args()
+
+    generator = BoardGenerator(args.seed, args.size)
+    target_args = {name: value for name, value in vars(args).items()
+                   if name.startswith(("min_", "max_")) and value is not None}
+    if target_args:
+        import boggle_dictionary
+        from ex11_utils import PrefixIndex
+
+        # the words in memory solve faster than the memory mapped dictionary
+        words = PrefixIndex(boggle_dictionary.read_text_dictionary())
+        # the candidate words prefilter needs numpy, without it every board
+        # that passes the vowels check is solved
+        letter_counts = None
+        if boggle_dictionary.np is not None:
+            letter_counts = boggle_dictionary.LetterCountMatrix(words.words)
+        quality = QualityFilter(words, long_word_length=args.long_word_length,
+                                letter_counts=letter_counts, **target_args)
+        boards = generate_quality_boards(generator, quality, args.count)
+    else:
+        quality = None
+        boards = generator.boards(args.count)
+    for board in boards:
+        sys.stdout.write("/".join("".join(row) for row in board) + "\n")
+    if quality is not None:
+        sys.stderr.write(f"{quality.stats}\n")
@@ -5,7 +5,7 @@
 # DESCRIPTION:A helper file for ex11 that randomizes a Boggle board
 ##############################################################################
 import random
-from typing import List
+from typing import List, Optional
 
 
 BOARD_SIZE = 4
@@ -28,27 +28,87 @@ LETTERS = [
     ['N', 'U', 'I', 'H', 'M', 'QU']
 ]
 
+# the 25 dice of the 5x5 game
+BIG_LETTERS = [
+    ['A', 'A', 'A', 'F', 'R', 'S'],
+    ['A', 'A', 'E', 'E', 'E', 'E'],
+    ['A', 'A', 'F', 'I', 'R', 'S'],
+    ['A', 'D', 'E', 'N', 'N', 'N'],
+    ['A', 'E', 'E', 'E', 'E', 'M'],
+    ['A', 'E', 'E', 'G', 'M', 'U'],
+    ['A', 'E', 'G', 'M', 'N', 'N'],
+    ['A', 'F', 'I', 'R', 'S', 'Y'],
+    ['B', 'J', 'K', 'QU', 'X', 'Z'],
+    ['C', 'C', 'E', 'N', 'S', 'T'],
+    ['C', 'E', 'I', 'I', 'L', 'T'],
+    ['C', 'E', 'I', 'L', 'P', 'T'],
+    ['C', 'E', 'I', 'P', 'S', 'T'],
+    ['D', 'D', 'H', 'N', 'O', 'T'],
+    ['D', 'H', 'H', 'L', 'O', 'R'],
+    ['D', 'H', 'L', 'N', 'O', 'R'],
+    ['D', 'H', 'L', 'N', 'O', 'R'],
+    ['E', 'I', 'I', 'I', 'T', 'T'],
+    ['E', 'M', 'O', 'T', 'T', 'T'],
+    ['E', 'N', 'S', 'S', 'S', 'U'],
+    ['F', 'I', 'P', 'R', 'S', 'Y'],
+    ['G', 'O', 'R', 'R', 'V', 'W'],
+    ['I', 'P', 'R', 'R', 'R', 'Y'],
+    ['N', 'O', 'O', 'T', 'U', 'W'],
+    ['O', 'O', 'O', 'T', 'T', 'U']
+]
+
+MIN_BOARD_SIZE = 4
+MAX_BOARD_SIZE = 10
+
+
+def dice_for_size(board_size: int) -> List[List[str]]:
+    """
+    Returns the dice for a board of the given size: the classic 16 dice for
+    4x4, the 25 dice of the 5x5 game for 5x5, and for bigger boards the 5x5
+    dice together with the classic dice, taken again from the start as many
+    times as needed for board_size * board_size dice.
+    :param board_size: number of rows and columns of the board.
+    :return: a list of board_size * board_size dice.
+    """
+    if not MIN_BOARD_SIZE <= board_size <= MAX_BOARD_SIZE:
+        raise ValueError(f"board size must be between {MIN_BOARD_SIZE} "
+                         f"and {MAX_BOARD_SIZE}, not {board_size}")
+    if board_size == 4:
+        return LETTERS
+    all_dice = BIG_LETTERS + LETTERS
+    count = board_size * board_size
+    return [all_dice[i % len(all_dice)] for i in range(count)]
+
 
-def randomize_board(dice_list: List[List[str]] = LETTERS) -> List[List[str]]:
+def randomize_board(dice_list: Optional[List[List[str]]] = None,
+                    board_size: int = BOARD_SIZE,
+                    rng=random) -> List[List[str]]:
     """
     Creates a random Boggle board.
-    :param dice_list: 2-dimensional list of letters to generate the board from.
+    :param dice_list: 2-dimensional list of letters to generate the board from
+                      (the dice of dice_for_size(board_size) if not given).
+    :param board_size: number of rows and columns of the board.
+    :param rng: source of randomness (the random module, or a seeded random.Random).
     :return: a 2D list of strings representing a random Boggle board.
     """
+    if dice_list is None:
+        dice_list = dice_for_size(board_size)
     dice_indices = list(range(len(dice_list)))
-    random.shuffle(dice_indices)
+    rng.shuffle(dice_indices)
     dice_indices_iter = iter(dice_indices)
     board = []
-    for i in range(BOARD_SIZE):
+    for i in range(board_size):
         row = []
-        for j in range(BOARD_SIZE):
+        for j in range(board_size):
             die = dice_list[next(dice_indices_iter)]
-            letter = random.choice(die)
+            letter = rng.choice(die)
             row.append(letter)
         board.append(row)
     return board
 
 
 if __name__ == "__main__":
+    import sys
     from pprint import pprint
-    pprint(randomize_board())
+    pprint(randomize_board(board_size=int(sys.argv[1]) if len(sys.argv) > 1
+                           else BOARD_SIZE))
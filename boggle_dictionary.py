@@ -0,0 +1,404 @@
+##############################################################################
+# FILE: boggle_dictionary.py
+# EXERCISE: Intro2cs ex11 2023-2024
+# WRITER: LiorHaleli and ElianaPetel
+# DESCRIPTION: Compact binary dictionary that is loaded with mmap
+##############################################################################
+
+import argparse
+import mmap
+import os
+import sys
+import tempfile
+import threading
+from array import array
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+from ex11_utils import Board, PrefixIndex, get_adjacency
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for LetterCountMatrix
+    np = None
+
+DICT_PATH = "boggle_dict.txt"
+PACKED_DICT_PATH = "boggle_dict.bin"
+
+# file layout: magic, byte order, word count, (count + 1) offsets of
+# 4 bytes each and then all the sorted words joined together in ascii
+MAGIC = b"BGDX"
+HEADER_SIZE = 12
+BYTE_ORDERS = {"little": b"LE\0\0", "big": b"BE\0\0"}
+
+# bits of the letter pair masks of LetterCountMatrix
+PAIR_BITS = 256
+
+# the umask can only be read by setting it, so it is read once on import
+# (and not while the dictionary is built on a thread of the game)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+class PackedWords:
+    """Read only sequence of the sorted words inside a packed dictionary.
+    Words are decoded only when they are looked at, so the dictionary
+    never turns into 279k python strings."""
+
+    def __init__(self, data: Union[bytes, mmap.mmap]):
+        if data[:4] != MAGIC:
+            raise ValueError("not a packed boggle dictionary")
+        if data[4:8] != BYTE_ORDERS[sys.byteorder]:
+            raise ValueError("packed dictionary was built on another byte order")
+        self._data = data
+        count = int.from_bytes(data[8:HEADER_SIZE], sys.byteorder)
+        offsets_end = HEADER_SIZE + 4 * (count + 1)
+        if len(data) < offsets_end:
+            raise ValueError("packed dictionary is cut short")
+        self._offsets = memoryview(data)[HEADER_SIZE:offsets_end].cast("I")
+        # the words blob ends exactly at the last offset
+        if len(data) != offsets_end + self._offsets[count]:
+            raise ValueError("packed dictionary is cut short")
+        self._blob_start = offsets_end
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int) -> str:
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("word index out of range")
+        start = self._blob_start + self._offsets[i]
+        end = self._blob_start + self._offsets[i + 1]
+        return self._data[start:end].decode("ascii")
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+    def bisect_left(self, key: bytes, lo: int = 0, hi: int = None) -> int:
+        """bisect over the raw word bytes, without decoding any word"""
+        if hi is None:
+            hi = self._count
+        data, offsets, base = self._data, self._offsets, self._blob_start
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if data[base + offsets[mid]:base + offsets[mid + 1]] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+
+class PackedDictionary(PrefixIndex):
+    """Prefix index whose words live in a memory mapped packed file
+    instead of a python list. Can be passed anywhere a words collection
+    or a PrefixIndex is expected."""
+
+    def __init__(self, path: str = PACKED_DICT_PATH):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.words = PackedWords(self._mmap)
+
+    def __iter__(self):
+        return iter(self.words)
+
+    def __contains__(self, word: str) -> bool:
+        i = self.words.bisect_left(word.encode("ascii"))
+        return i < len(self.words) and self.words[i] == word
+
+    def prefix_range(self, prefix: str, lo: int = 0, hi: int = None):
+        if hi is None:
+            hi = len(self.words)
+        key = prefix.encode("ascii")
+        lo = self.words.bisect_left(key, lo, hi)
+        hi = self.words.bisect_left(key + b"\xff", lo, hi)
+        return lo, hi
+
+
+def letters_mask(letters: Iterable[str]) -> int:
+    """bit i is set for the i-th letter of the alphabet in the letters.
+    raises ValueError for anything that is not a letter A-Z"""
+    mask = 0
+    for letter in letters:
+        if not "A" <= letter <= "Z" or len(letter) != 1:
+            raise ValueError(f"{letter!r} is not a letter A-Z")
+        mask |= 1 << (ord(letter) - ord("A"))
+    return mask
+
+
+class LetterIndex:
+    """Index of the dictionary by the letters of each word, for cutting the
+    dictionary down to the words that a board has the letters for.
+    A word can only be on a board if every letter of it is on the board at
+    least as many times as in the word. A QU cell counts as one Q and one U,
+    so the check never drops a word that could be on the board.
+    Words are grouped by the set of their letters (as a bitmask) and each
+    word keeps only the letters it has more than once, so checking a board
+    looks up the groups of the subsets of its letters and then compares a
+    few counts."""
+
+    def __init__(self, words: Iterable[str]):
+        self.groups: Dict[int, List[Tuple[str, Tuple[Tuple[str, int], ...]]]] = {}
+        for word in words:
+            letters = set(word)
+            repeated = () if len(letters) == len(word) else tuple(
+                (letter, word.count(letter)) for letter in letters
+                if word.count(letter) > 1)
+            self.groups.setdefault(letters_mask(letters), []).append(
+                (word, repeated))
+
+    def candidates(self, board: Board) -> List[str]:
+        """Returns the words that the board has enough letters for"""
+        counts: Dict[str, int] = {}
+        for row in board:
+            for cell in row:
+                for letter in cell:
+                    counts[letter] = counts.get(letter, 0) + 1
+        board_mask = letters_mask(counts)
+        found = []
+        for group in self.groups_within(board_mask):
+            for word, repeated in group:
+                for letter, count in repeated:
+                    if counts[letter] < count:
+                        break
+                else:
+                    found.append(word)
+        return found
+
+    def groups_within(self, board_mask: int):
+        """Yields the groups of words whose letters are all in the mask"""
+        if 1 << bin(board_mask).count("1") > len(self.groups):
+            # many letters (large boards): fewer groups than letter subsets
+            for mask, group in self.groups.items():
+                if not mask & ~board_mask:
+                    yield group
+            return
+        # goes over every subset of the board's letters, from the full set down
+        subset = board_mask
+        while True:
+            group = self.groups.get(subset)
+            if group:
+                yield group
+            if subset == 0:
+                break
+            subset = (subset - 1) & board_mask
+
+    def candidate_index(self, board: Board) -> PrefixIndex:
+        """Prefix index of just the board's candidate words, for the solver"""
+        return PrefixIndex(self.candidates(board))
+
+
+class LetterCountMatrix:
+    """The dictionary as a numpy matrix of letter counts: row i holds how
+    many times each letter A-Z appears in word i, and lengths[i] is the
+    length of word i. It answers the same question as LetterIndex (which
+    words does a board have the letters for) for a whole batch of boards
+    at once, with array operations instead of a python loop per word.
+    Needs numpy."""
+
+    def __init__(self, words: Iterable[str]):
+        if np is None:
+            raise ImportError("LetterCountMatrix needs numpy")
+        self.words: Sequence[str] = sorted(set(words))
+        encoded = [word.encode("ascii") for word in self.words]
+        self.lengths = np.fromiter(map(len, encoded), dtype=np.uint8,
+                                   count=len(encoded))
+        letters = np.frombuffer(b"".join(encoded), dtype=np.uint8) - ord("A")
+        word_ids = np.repeat(np.arange(len(encoded)), self.lengths)
+        self.counts = np.bincount(
+            word_ids * 26 + letters, minlength=len(encoded) * 26
+        ).reshape(len(encoded), 26).astype(np.uint8)
+        self.masks = (self.counts > 0).astype(np.uint32) @ (
+            np.uint32(1) << np.arange(26, dtype=np.uint32))
+        # the pairs of letters that follow each other in each word, as bits
+        # of PAIR_BITS bits (see pair_bit), in PAIR_BITS // 64 numbers a word
+        same_word = word_ids[:-1] == word_ids[1:]
+        bits = pair_bit(letters[:-1][same_word].astype(np.int64),
+                        letters[1:][same_word].astype(np.int64))
+        self.pair_masks = np.zeros((len(encoded), PAIR_BITS // 64),
+                                   dtype=np.uint64)
+        np.bitwise_or.at(self.pair_masks, (word_ids[:-1][same_word], bits // 64),
+                         np.uint64(1) << (bits % 64).astype(np.uint64))
+        # the words as a numpy array too, for picking many of them at once
+        self._word_array = np.array(self.words, dtype=object)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    @staticmethod
+    def board_counts(boards: Sequence[Board]) -> "np.ndarray":
+        """letter counts of the boards, one row of 26 counts per board
+        (a QU cell counts as a Q and a U, like in LetterIndex).
+        raises ValueError if a board has anything but letters A-Z"""
+        counts = np.zeros((len(boards), 26), dtype=np.uint8)
+        for i, board in enumerate(boards):
+            letters = "".join(cell for row in board for cell in row)
+            if not (letters.isascii() and letters.isalpha() and letters.isupper()):
+                raise ValueError(f"board {i} has cells that are not letters A-Z")
+            counts[i] = np.bincount(
+                np.frombuffer(letters.encode("ascii"), dtype=np.uint8) - ord("A"),
+                minlength=26)
+        return counts
+
+    @staticmethod
+    def board_pair_masks(boards: Sequence[Board]) -> "np.ndarray":
+        """bits of the pairs of letters that can follow each other on each
+        board: the letters inside a QU cell, and the last letter of a cell
+        with the first letter of every cell around it"""
+        masks = np.zeros((len(boards), PAIR_BITS // 64), dtype=np.uint64)
+        for i, board in enumerate(boards):
+            rows, cols = len(board), len(board[0])
+            cells = [cell for row in board for cell in row]
+            bits = set()
+            for cell, neighbors in zip(cells, get_adjacency(rows, cols)):
+                for first, second in zip(cell, cell[1:]):
+                    bits.add(pair_bit(ord(first) - ord("A"), ord(second) - ord("A")))
+                last = ord(cell[-1]) - ord("A")
+                for neighbor in neighbors:
+                    bits.add(pair_bit(last, ord(cells[neighbor][0]) - ord("A")))
+            for bit in bits:
+                masks[i, bit // 64] |= np.uint64(1 << (bit % 64))
+        return masks
+
+    def candidate_ids(self, boards: Sequence[Board]) -> List["np.ndarray"]:
+        """The (sorted) numbers of the candidate words of each board.
+        all the boards are checked against the letter masks of all the words
+        in one operation. the few words whose letters are all on the board
+        stay candidates only if every pair of letters that follow each other
+        in them can follow each other on the board, and if the board has
+        enough of each of their letters."""
+        board_counts = self.board_counts(boards)
+        board_pairs = self.board_pair_masks(boards)
+        board_masks = (board_counts > 0).astype(np.uint32) @ (
+            np.uint32(1) << np.arange(26, dtype=np.uint32))
+        letters_on_board = (self.masks[None, :] & ~board_masks[:, None]) == 0
+        ids = []
+        for counts, pairs, row in zip(board_counts, board_pairs, letters_on_board):
+            word_ids = np.flatnonzero(row)
+            # the pairs first, they leave much fewer words to count letters of
+            word_ids = word_ids[
+                (self.pair_masks[word_ids] & ~pairs == 0).all(axis=1)]
+            word_ids = word_ids[(self.counts[word_ids] <= counts).all(axis=1)]
+            ids.append(word_ids)
+        return ids
+
+    def candidates(self, boards: Sequence[Board]) -> List[List[str]]:
+        """The candidate words of each board, in sorted order"""
+        return [self._word_array[word_ids].tolist()
+                for word_ids in self.candidate_ids(boards)]
+
+    def index_of(self, word_ids: "np.ndarray") -> PrefixIndex:
+        """Prefix index of the words with the given (sorted) numbers"""
+        # the words are sorted, so words picked in order of their numbers are
+        return PrefixIndex.from_sorted(self._word_array[word_ids].tolist())
+
+    def candidate_indexes(self, boards: Sequence[Board]) -> List[PrefixIndex]:
+        """Prefix index of the candidate words of each board, for the solver"""
+        return [self.index_of(word_ids) for word_ids in self.candidate_ids(boards)]
+
+
+def pair_bit(first, second):
+    """The bit of a pair of letters (numbers 0-25) in a pair mask. many pairs
+    share each bit, which can only keep more candidates, never drop one."""
+    return (first * 26 + second) % PAIR_BITS
+
+
+def pack_words(words: Iterable[str]) -> bytes:
+    """Returns the packed dictionary file content of the given words"""
+    sorted_words: List[bytes] = sorted({word.encode("ascii") for word in words})
+    offsets = array("I", [0])
+    for word in sorted_words:
+        offsets.append(offsets[-1] + len(word))
+    return b"".join([
+        MAGIC,
+        BYTE_ORDERS[sys.byteorder],
+        len(sorted_words).to_bytes(4, sys.byteorder),
+        offsets.tobytes(),
+        b"".join(sorted_words),
+    ])
+
+
+def read_text_dictionary(path: str = DICT_PATH) -> List[str]:
+    """Reads a dictionary text file with one word in each line"""
+    with open(path, "r") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def build_packed_dictionary(text_path: str = DICT_PATH,
+                            packed_path: str = PACKED_DICT_PATH) -> None:
+    """Builds the packed dictionary file from the text dictionary.
+    the file is written next to its final place, under a name of its own,
+    and then renamed, so processes that are loading it never see half of
+    a file, and processes that build it together don't mix their writes."""
+    data = pack_words(read_text_dictionary(text_path))
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=os.path.basename(packed_path) + ".", suffix=".tmp",
+        dir=os.path.dirname(os.path.abspath(packed_path)))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        # mkstemp makes the file readable only by us, but the dictionary
+        # is for every user, like a file made with open()
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, packed_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def is_packed_up_to_date(text_path: str = DICT_PATH,
+                         packed_path: str = PACKED_DICT_PATH) -> bool:
+    return (os.path.exists(packed_path)
+            and os.path.getmtime(packed_path) >= os.path.getmtime(text_path))
+
+
+def load_dictionary(text_path: str = DICT_PATH,
+                    packed_path: str = PACKED_DICT_PATH) -> PrefixIndex:
+    """Loads the game dictionary from its packed file, building the packed
+    file first if it is missing or older than the text dictionary.
+    if the packed file can't be written, the text file is used directly."""
+    try:
+        if not is_packed_up_to_date(text_path, packed_path):
+            build_packed_dictionary(text_path, packed_path)
+        return PackedDictionary(packed_path)
+    except (OSError, ValueError):
+        return PrefixIndex(read_text_dictionary(text_path))
+
+
+# the game dictionary, loaded once on first use
+_dictionary = None
+_dictionary_lock = threading.Lock()
+
+
+def get_dictionary() -> PrefixIndex:
+    """Returns the game dictionary, loading it the first time it is asked
+    for. if it is being loaded in the background, waits for it."""
+    global _dictionary
+    with _dictionary_lock:
+        if _dictionary is None:
+            _dictionary = load_dictionary()
+        return _dictionary
+
+
+def load_dictionary_in_background() -> threading.Thread:
+    """Starts loading the game dictionary on a worker thread, so it is
+    ready by the time the game asks for it"""
+    thread = threading.Thread(target=get_dictionary, daemon=True)
+    thread.start()
+    return thread
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Build the packed boggle dictionary from the text one")
+    parser.add_argument("text_path", nargs="?", default=DICT_PATH)
+    parser.add_argument("packed_path", nargs="?", default=PACKED_DICT_PATH)
+    args = parser.parse_args(argv)
+    build_packed_dictionary(args.text_path, args.packed_path)
+    print(f"packed {args.text_path} into {args.packed_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@
 
 import tkinter as tk
 import ex11_utils
+import boggle_dictionary
 
 
 class BoggleMenu:
@@ -118,6 +119,8 @@ class BoggleMenu:
 
     def run(self):
         """Display the homepage menu"""
+        # the dictionary loads while the player looks at the menu
+        boggle_dictionary.load_dictionary_in_background()
         self.typing_title()
         self.instructions_button.pack(pady=15)
         self.play_button.pack()
@@ -0,0 +1,263 @@
+##############################################################################
+# FILE: boggle_solution_store.py
+# EXERCISE: Intro2cs ex11 2023-2024
+# WRITER: LiorHaleli and ElianaPetel
+# DESCRIPTION: On disk store of solved boards, shared by rotated and
+#              reflected copies of the same board
+##############################################################################
+
+import functools
+import json
+import os
+import sqlite3
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import ex11_utils
+from boggle_dictionary import DICT_PATH
+from ex11_utils import Board, BoardSolution, Path
+
+SOLUTIONS_PATH = "boggle_solutions.sqlite"
+# the stored solutions are trimmed to this many bytes of words and paths
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+Cell = Tuple[int, int]
+
+
+def board_symmetries(rows: int, cols: int) -> List[Callable[[int, int], Cell]]:
+    """The functions that move a cell of a rows x cols board to its place
+    on the rotated or reflected board: 8 of them for a square board, and
+    for other boards only the 4 that keep the board's shape"""
+    symmetries = [
+        lambda r, c: (r, c),
+        lambda r, c: (r, cols - 1 - c),
+        lambda r, c: (rows - 1 - r, c),
+        lambda r, c: (rows - 1 - r, cols - 1 - c),
+    ]
+    if rows == cols:
+        symmetries += [
+            lambda r, c: (c, r),
+            lambda r, c: (c, rows - 1 - r),
+            lambda r, c: (cols - 1 - c, r),
+            lambda r, c: (cols - 1 - c, rows - 1 - r),
+        ]
+    return symmetries
+
+
+def board_text(board: Board) -> str:
+    # cells are separated too, so a QU cell is not a Q cell and a U cell
+    return "/".join(",".join(row) for row in board)
+
+
+@functools.lru_cache(maxsize=None)
+def _symmetry_orders(rows: int, cols: int
+                     ) -> List[Tuple[Tuple[int, ...], Dict[Cell, Cell]]]:
+    # for every symmetry: which cell (by its index in the board's rows one
+    # after the other) goes to each place of the moved board, and the cells
+    # map that canonical_board returns. the same for all boards of a size
+    orders = []
+    for move in board_symmetries(rows, cols):
+        cells = {(r, c): move(r, c) for r in range(rows) for c in range(cols)}
+        # every symmetry keeps the shape (the 4 extra ones are of squares)
+        order = [0] * (rows * cols)
+        for (r, c), (new_r, new_c) in cells.items():
+            order[new_r * cols + new_c] = r * cols + c
+        orders.append((tuple(order), cells))
+    return orders
+
+
+def canonical_board(board: Board) -> Tuple[str, Dict[Cell, Cell]]:
+    """Returns the key of the board, which is the same for all its rotations
+    and reflections, and where every cell of the board is on the board of
+    the key"""
+    rows, cols = len(board), len(board[0])
+    flat = [cell for row in board for cell in row]
+    best, best_cells = None, None
+    for order, cells in _symmetry_orders(rows, cols):
+        # the cells in order compare like their board_text (the separators
+        # are before every letter), so the text is only made once
+        moved = [flat[i] for i in order]
+        if best is None or moved < best:
+            best, best_cells = moved, cells
+    return board_text([best[row * cols:(row + 1) * cols]
+                       for row in range(rows)]), best_cells
+
+
+def dictionary_id(text_path: str = DICT_PATH) -> str:
+    """Identifies a version of the dictionary: solutions found with another
+    dictionary are not the solutions of this one"""
+    try:
+        stat = os.stat(text_path)
+    except OSError:
+        return os.path.abspath(text_path)
+    return f"{os.path.abspath(text_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class SolutionStore:
+    """sqlite file of solved boards: for every board (by its canonical key)
+    its words, the longest path of each word and its max score.
+    when the stored solutions pass max_bytes, the ones that were used the
+    longest time ago are dropped (down to 90% of max_bytes, so it doesn't
+    happen again on the next board). the size of all of them is kept in
+    the meta table, so a put doesn't go over the whole table. the times
+    boards were used are written in groups of TOUCH_BATCH, not on every get.
+    everything in it belongs to a single dictionary, and it empties itself
+    when it is opened with another one."""
+
+    TOUCH_BATCH = 256
+
+    def __init__(self, path: str = SOLUTIONS_PATH,
+                 words_id: Optional[str] = None,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        :param path: the sqlite file, created if it doesn't exist.
+        :param words_id: the dictionary_id of the dictionary the solutions
+                         are found with (of the game dictionary if not given).
+        :param max_bytes: size of the stored solutions to trim down to.
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._touched: Dict[str, float] = {}  # used times not written yet
+        # many processes (like boggle_solver_cli.py -j) may share the file
+        self._db = sqlite3.connect(path, timeout=30)
+        # it is only a cache, so a write lost in a crash is not a problem
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=OFF")
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS solutions (board TEXT PRIMARY KEY, "
+                "word_paths TEXT, word_count INTEGER, max_score INTEGER, "
+                "size INTEGER, used REAL)")
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS solutions_used ON solutions (used)")
+            words_id = words_id if words_id is not None else dictionary_id()
+            row = self._db.execute(
+                "SELECT value FROM meta WHERE key = 'words_id'").fetchone()
+            if row is None or row[0] != words_id:
+                self._db.execute("DELETE FROM solutions")
+                self._db.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('words_id', ?)",
+                    (words_id,))
+                self._db.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('total_size', 0)")
+            # the total size is counted once, for a file that has no total
+            self._db.execute(
+                "INSERT OR IGNORE INTO meta SELECT 'total_size', "
+                "COALESCE(SUM(size), 0) FROM solutions")
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+    def get(self, board: Board) -> Optional[Dict[str, Path]]:
+        """Returns the longest path of every word on the board, in the
+        board's own cells, or None if the board was never stored"""
+        key, cells = canonical_board(board)
+        row = self._db.execute(
+            "SELECT word_paths FROM solutions WHERE board = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched[key] = time.time()
+        if len(self._touched) >= self.TOUCH_BATCH:
+            with self._db:
+                self._write_touched()
+        back = {stored: cell for cell, stored in cells.items()}
+        return {word: [back[tuple(cell)] for cell in path]
+                for word, path in json.loads(row[0]).items()}
+
+    def put(self, board: Board, best_paths: Dict[str, Path]) -> None:
+        """Stores the longest path of every word on the board (like the
+        result of ex11_utils.find_best_paths)"""
+        key, cells = canonical_board(board)
+        word_paths = json.dumps(
+            {word: [cells[cell] for cell in path]
+             for word, path in best_paths.items()},
+            separators=(",", ":"))
+        with self._db:
+            # the transaction starts before the old size is read, so another
+            # process can't store the same board between the read and the
+            # write (and add its size to the total a second time)
+            self._db.execute("BEGIN IMMEDIATE")
+            old = self._db.execute(
+                "SELECT size FROM solutions WHERE board = ?", (key,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?, ?, ?)",
+                (key, word_paths, len(best_paths),
+                 sum(len(word) ** 2 for word in best_paths),
+                 len(word_paths), time.time()))
+            self._add_size(len(word_paths) - (old[0] if old else 0))
+            self._write_touched()
+            self._evict()
+
+    def put_solution(self, solution: BoardSolution) -> None:
+        """Stores the longest path of every word of a BoardSolution"""
+        self.put(solution.board, {word: max(paths, key=len)
+                                  for word, paths in solution.word_paths.items()})
+
+    def _add_size(self, size: int) -> int:
+        # adds to the total size in meta (inside the caller's transaction,
+        # so processes that share the file don't lose each other's sizes)
+        self._db.execute(
+            "UPDATE meta SET value = CAST(value AS INTEGER) + ? "
+            "WHERE key = 'total_size'", (size,))
+        return int(self._db.execute(
+            "SELECT value FROM meta WHERE key = 'total_size'").fetchone()[0])
+
+    def _write_touched(self) -> None:
+        self._db.executemany("UPDATE solutions SET used = ? WHERE board = ?",
+                             [(used, key) for key, used in self._touched.items()])
+        self._touched = {}
+
+    def _evict(self) -> None:
+        # drops the least recently used solutions until the rest fit
+        total = self._add_size(0)
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * 9 // 10
+        dropped = []
+        freed = 0
+        for key, size in self._db.execute(
+                "SELECT board, size FROM solutions ORDER BY used"):
+            if total - freed <= target:
+                break
+            dropped.append((key,))
+            freed += size
+        self._db.executemany("DELETE FROM solutions WHERE board = ?", dropped)
+        self._add_size(-freed)
+
+    def best_paths(self, board: Board, words: Iterable[str]) -> Dict[str, Path]:
+        """The stored best paths of the board, solving and storing it first
+        if it is not stored yet"""
+        best_paths = self.get(board)
+        if best_paths is None:
+            best_paths = ex11_utils.find_best_paths(board, words)
+            self.put(board, best_paths)
+        return best_paths
+
+    def close(self) -> None:
+        with self._db:
+            self._write_touched()
+        self._db.close()
+
+
+def stored_solution(board: Board, best_paths: Dict[str, Path]) -> BoardSolution:
+    """BoardSolution of stored best paths, which has a single path
+    for each word"""
+    return BoardSolution(board, {word: [path] for word, path in best_paths.items()})
+
+
+def open_solution_store(path: str = SOLUTIONS_PATH,
+                        words_id: Optional[str] = None,
+                        max_bytes: int = DEFAULT_MAX_BYTES) -> Optional[SolutionStore]:
+    """Opens the store, or returns None if it can't be opened (like in a
+    read only directory), so callers just solve without it"""
+    try:
+        return SolutionStore(path, words_id, max_bytes)
+    except (sqlite3.Error, OSError):
+        return None
@@ -0,0 +1,317 @@
+##############################################################################
+# FILE: boggle_solver_cli.py
+# EXERCISE: Intro2cs ex11 2023-2024
+# WRITER: LiorHaleli and ElianaPetel
+# DESCRIPTION: Command line solver for many boards, without the GUI
+##############################################################################
+
+import argparse
+import collections
+import gc
+import json
+import math
+import multiprocessing
+import os
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, TextIO, Tuple
+
+import boggle_dictionary
+import boggle_solution_store
+import ex11_utils
+from ex11_utils import Board
+
+
+def split_cells(row: str) -> List[str]:
+    """Splits a row of letters into cells, keeping QU as a single cell"""
+    cells = []
+    i = 0
+    row = row.upper()
+    while i < len(row):
+        if row.startswith("QU", i):
+            cells.append("QU")
+            i += 2
+        else:
+            cells.append(row[i])
+            i += 1
+    return cells
+
+
+def is_cell(cell: str) -> bool:
+    return cell == "QU" or (len(cell) == 1 and "A" <= cell <= "Z")
+
+
+def parse_board(line: str) -> Board:
+    """Reads a board from one line of input. The line is either json (a 2d
+    list of cells, or an object with a "board" key holding one), or letters
+    with the rows separated by "/" or spaces. A row of letters alone is
+    taken as a square board, like "SERSPATGLINESERS" for a 4x4 board.
+    Every cell must be a letter A-Z or QU."""
+    line = line.strip()
+    if line.startswith(("[", "{")):
+        board = json.loads(line)
+        if isinstance(board, dict):
+            board = board["board"]
+        if not isinstance(board, list) or not all(
+                isinstance(row, list) for row in board):
+            raise ValueError("a json board must be a list of rows")
+        board = [[str(cell).upper() for cell in row] for row in board]
+    else:
+        board = [split_cells(row) for row in line.replace("/", " ").split()]
+        if len(board) == 1:
+            cells = board[0]
+            size = math.isqrt(len(cells))
+            if size * size != len(cells):
+                raise ValueError("a single row of letters must be a square board")
+            board = [cells[i:i + size] for i in range(0, len(cells), size)]
+    if not board or not board[0] or any(len(row) != len(board[0]) for row in board):
+        raise ValueError("board rows must all have the same number of cells")
+    for row in board:
+        for cell in row:
+            if not is_cell(cell):
+                raise ValueError(f"{cell!r} is not a board cell (A-Z or QU)")
+    return board
+
+
+def solve_board_result(board: Board, words: Iterable[str],
+                       with_words: bool = True,
+                       with_paths: bool = False,
+                       store=None) -> Dict[str, Any]:
+    """Solves a board and returns the json-ready result of it.
+    words may be a LetterIndex, then only the board's candidates are searched.
+    with a SolutionStore, a board that was solved before is not solved again"""
+    best_paths = store.get(board) if store is not None else None
+    if best_paths is None:
+        if isinstance(words, boggle_dictionary.LetterIndex):
+            words = words.candidate_index(board)
+        best_paths = ex11_utils.find_best_paths(board, words)
+        if store is not None:
+            store.put(board, best_paths)
+    result: Dict[str, Any] = {
+        "board": board,
+        "word_count": len(best_paths),
+        "max_score": sum(len(word) ** 2 for word in best_paths),
+    }
+    if with_words:
+        result["words"] = sorted(best_paths)
+    if with_paths:
+        result["paths"] = {word: best_paths[word] for word in sorted(best_paths)}
+    return result
+
+
+def read_boards(lines: Iterable[str]) -> Iterator[Any]:
+    """Yields the board of every non empty line, or the error message of
+    a line that is not a board, so one bad line doesn't stop a long run"""
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, parse_board(line)
+        except (ValueError, KeyError, TypeError) as e:
+            yield line_number, e
+
+
+def result_line(item: Tuple[int, Any], words: Iterable[str],
+                with_words: bool, with_paths: bool,
+                store=None) -> Tuple[str, bool]:
+    """Returns the json line of one item of read_boards, and whether the
+    item was an error"""
+    line_number, board = item
+    if isinstance(board, Exception):
+        result = {"line": line_number, "error": str(board)}
+    else:
+        result = solve_board_result(board, words, with_words, with_paths, store)
+    return json.dumps(result, separators=(",", ":")) + "\n", "error" in result
+
+
+def result_lines(items: List[Tuple[int, Any]], words: Iterable[str],
+                 with_words: bool, with_paths: bool,
+                 store=None) -> List[Tuple[str, bool]]:
+    """result_line of a batch of items. With a LetterCountMatrix the
+    candidate words of all the batch's boards are found together first."""
+    if isinstance(words, boggle_dictionary.LetterCountMatrix):
+        boards = [board for _, board in items if not isinstance(board, Exception)]
+        indexes = iter(words.candidate_indexes(boards))
+        return [result_line(item, words if isinstance(item[1], Exception)
+                            else next(indexes), with_words, with_paths, store)
+                for item in items]
+    return [result_line(item, words, with_words, with_paths, store)
+            for item in items]
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# state of a pool worker process, set once by init_worker
+_worker_words = None
+_worker_options = (True, False)
+_worker_store = None
+# the words of the parent process, which forked workers get without loading
+_parent_words = None
+
+
+def load_words(text_path: str, packed_path: str, letter_filter: bool):
+    """The dictionary in memory, or its letter counts index for
+    letter_filter (the numpy one if numpy is installed)"""
+    words = boggle_dictionary.load_dictionary(text_path, packed_path)
+    if isinstance(words, boggle_dictionary.PackedDictionary):
+        # the packed file loads fast, but its words in a list are searched
+        # about 3 times faster than the memory mapped ones
+        words = ex11_utils.PrefixIndex.from_sorted(list(words))
+    if not letter_filter:
+        return words
+    if boggle_dictionary.np is not None:
+        return boggle_dictionary.LetterCountMatrix(words.words)
+    return boggle_dictionary.LetterIndex(words.words)
+
+
+def init_worker(text_path: str, packed_path: str, letter_filter: bool,
+                with_words: bool, with_paths: bool,
+                store_path: str = None) -> None:
+    """Sets up a pool worker. A forked worker shares the words the parent
+    loaded (copy on write), and a spawned one loads them itself, from the
+    packed dictionary that the parent already built.
+    every worker opens its own connection to the solution store, if any."""
+    global _worker_words, _worker_options, _worker_store
+    if _parent_words is not None:
+        _worker_words = _parent_words
+    else:
+        _worker_words = load_words(text_path, packed_path, letter_filter)
+    _worker_options = (with_words, with_paths)
+    if store_path is not None:
+        _worker_store = boggle_solution_store.open_solution_store(
+            store_path, boggle_solution_store.dictionary_id(text_path))
+
+
+def worker_result_lines(items: List[Tuple[int, Any]]) -> List[Tuple[str, bool]]:
+    return result_lines(items, _worker_words, *_worker_options, _worker_store)
+
+
+def solve_stream(lines: Iterable[str], out: TextIO, words: Iterable[str],
+                 with_words: bool = True, with_paths: bool = False,
+                 jobs: int = 1, chunk_size: int = 64,
+                 text_path: str = boggle_dictionary.DICT_PATH,
+                 packed_path: str = boggle_dictionary.PACKED_DICT_PATH,
+                 letter_filter: bool = False,
+                 store_path: str = None) -> int:
+    """Solves the board on every line and writes one json line of result
+    for each one, in the order of the lines. With more than one job the
+    boards are solved by a pool of worker processes, in chunks of
+    chunk_size boards. forked workers use the given words, and others
+    load the dictionary from the paths.
+    With store_path, boards are looked up in (and added to) that
+    SolutionStore before they are solved.
+    Returns the number of lines that were not boards."""
+    global _parent_words
+    batches = batched(read_boards(lines), chunk_size)
+    errors = 0
+
+    def write(batch_lines):
+        nonlocal errors
+        for line, is_error in batch_lines:
+            errors += is_error
+            out.write(line)
+
+    if jobs == 1:
+        store = None
+        if store_path is not None:
+            store = boggle_solution_store.open_solution_store(
+                store_path, boggle_solution_store.dictionary_id(text_path))
+        try:
+            for batch in batches:
+                write(result_lines(batch, words, with_words, with_paths, store))
+        finally:
+            if store is not None:
+                store.close()  # writes the used times it still holds
+        return errors
+    _parent_words = words
+    # the objects loaded so far are left out of garbage collection, so a
+    # collection in a forked worker doesn't write to (and copy) their pages
+    gc.freeze()
+    with multiprocessing.Pool(
+        jobs, init_worker,
+        (text_path, packed_path, letter_filter, with_words, with_paths,
+         store_path)
+    ) as pool:
+        # at most 2 chunks per worker are read ahead of the output, so a
+        # huge input is never all in memory (pool.imap would read it all),
+        # and the results are written in the order of the boards
+        pending = collections.deque()
+        for batch in batches:
+            pending.append(pool.apply_async(worker_result_lines, (batch,)))
+            if len(pending) >= jobs * 2:
+                write(pending.popleft().get())
+        while pending:
+            write(pending.popleft().get())
+    gc.unfreeze()
+    _parent_words = None
+    return errors
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Solve boggle boards (one per line, letters or json) "
+                    "and write the results as json lines")
+    parser.add_argument("input", nargs="?", default="-",
+                        help="file of boards, or - for stdin (default)")
+    parser.add_argument("--dict", default=boggle_dictionary.DICT_PATH,
+                        help="dictionary text file")
+    parser.add_argument("--no-words", action="store_true",
+                        help="write only the counts and the max score")
+    parser.add_argument("--paths", action="store_true",
+                        help="also write the best path of every word")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of worker processes (0 for one per core)")
+    parser.add_argument("--chunk-size", type=int, default=64,
+                        help="boards solved (and letter filtered) together")
+    parser.add_argument("--stats", action="store_true",
+                        help="print the solver's counters to stderr at the end "
+                             "(of this process only, not of --jobs workers)")
+    parser.add_argument("--letter-filter", action="store_true",
+                        help="search only the words each board has the "
+                             "letters for (vectorized with numpy if installed)")
+    parser.add_argument("--store", default=boggle_solution_store.SOLUTIONS_PATH,
+                        help="file of solved boards, to solve each board once "
+                             "(rotated and reflected boards included)")
+    parser.add_argument("--no-store", action="store_true",
+                        help="solve every board, without the solutions file")
+    args = parser.parse_args(argv)
+
+    jobs = args.jobs or os.cpu_count() or 1
+    if args.stats:
+        ex11_utils.set_solver_stats(True)
+    packed_path = os.path.splitext(args.dict)[0] + ".bin"
+    # also builds the packed dictionary before any worker needs it
+    words = load_words(args.dict, packed_path, args.letter_filter)
+    options = dict(with_words=not args.no_words, with_paths=args.paths,
+                   jobs=jobs, chunk_size=args.chunk_size,
+                   text_path=args.dict, packed_path=packed_path,
+                   letter_filter=args.letter_filter,
+                   store_path=None if args.no_store else args.store)
+    try:
+        if args.input == "-":
+            errors = solve_stream(sys.stdin, sys.stdout, words, **options)
+        else:
+            with open(args.input, "r") as f:
+                errors = solve_stream(f, sys.stdout, words, **options)
+        sys.stdout.flush()
+        if args.stats:
+            print(ex11_utils.solver_stats, file=sys.stderr)
+    except BrokenPipeError:
+        # the reader (like head) is gone, which is not an error of ours.
+        # stdout is pointed at devnull so python's exit flush is quiet too
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 0
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,17 +8,38 @@
 from tkinter import *
 from boggle_board_randomizer import *
 import ex11_utils
+import boggle_dictionary
+import boggle_solution_store
+from boggle_board_canvas import BoardCanvas
 from tkinter import simpledialog
+import math
+import queue
+import threading
+import time
 
-with open("boggle_dict.txt", "r") as f:
-    DICT_BOGGLE = {line.strip() for line in f}
+ROUND_SECONDS = 180  # 3 minutes
 
 
 class BoggleGui:
     """boggle gui class builds all the visuals elements needed
     to have user-friendly graphical interface"""
 
-    def __init__(self):
+    def __init__(self, board_size=BOARD_SIZE):
+        # number of rows and columns of the boards (4 up to 10)
+        self.board_size = board_size
+        # solutions of the current board, computed once per board
+        self._solution = None
+        self._solution_board = None
+        self.solution_cache_hits = 0
+        self.solution_cache_misses = 0
+        # background solving: finished solutions arrive through the queue,
+        # and hints asked for meanwhile wait in the waiting list
+        self._solved_queue = queue.Queue()
+        self._solving_board = None
+        self._waiting_for_solution = []
+        # boards solved in earlier games (None if the file can't be opened)
+        self._solution_store = boggle_solution_store.open_solution_store()
+        self._timer_job = None  # the pending after() call of the timer
         self._init_variables()
         self._init_home_page()
 
@@ -30,8 +51,7 @@ class BoggleGui:
         self._root.minsize(
             height=self.screen_height + 200, width=self.screen_width + 400
         )
-        self.board = randomize_board()
-        self.board_size = len(self.board)
+        self.new_board()
 
         self.set_top_frame()
         self.set_main_screen()
@@ -39,12 +59,17 @@ class BoggleGui:
 
     def _init_variables(self):
         self._score = 0
-        self.remaining_time = 180  # 3 minutes in seconds
+        self.remaining_time = ROUND_SECONDS  # seconds shown on the timer
+        # the round ends at this time.monotonic() time, whatever happens
+        # to the after() calls of the timer meanwhile
+        self._round_deadline = None
         self.selected_letters = []
-        self.selected_buttons = []
+        self.selected_path = []  # (row, col) of the selected cells, in order
+        self.selected_cells = set()  # the same cells, for quick lookups
         self.words_found = []  # valid words that the user found
         self.words_tried = []  # words that the user tried (non-valid\not in dict)
-        self._dictionary = DICT_BOGGLE
+        # loaded on first use (the menu starts loading it in the background)
+        self._dictionary = boggle_dictionary.get_dictionary()
         # when building an instance, the game doesn't start immediately
         self.game_started = False
 
@@ -64,23 +89,33 @@ class BoggleGui:
         self.start_button.place(relx=0.5, rely=0.9, anchor=CENTER)
 
     def start_game(self):
-        # removing the start button
+        # removing the start button and the results of the last game
         self.start_button.destroy()
+        if hasattr(self, "results_frame"):
+            self.results_frame.destroy()
         # deleting found_words and tried words list
         self.found_words.delete("1.0", "end")
         self.tried_words.delete("1.0", "end")
 
+        # solving the board in the background while the player starts
+        self.solve_board_in_background()
         # activating the game board and widgets
         self.set_board_frame()
         self.game_started = True
+        self._round_deadline = time.monotonic() + ROUND_SECONDS
+        self.remaining_time = None  # nothing is shown on the timer yet
         self.update_timer()  # starting the watch
         self.draw_timer_arc(40, 40, 35, 0, 360, ex11_utils.INTER_LIGHT)
 
     def reset_game(self):
         # restarting game if we in the middle
         if self.game_started:
-            # destroy the game board frame and its contents
-            self.board_frame.destroy()
+            # stopping the watch, so it doesn't tick into the next game
+            if self._timer_job is not None:
+                self._root.after_cancel(self._timer_job)
+                self._timer_job = None
+            # hide the game board, it is used again in the next game
+            self.board_frame.pack_forget()
             self.words_format.config(text="")
             self.display_game_results()  # show player his results
             self._init_variables()
@@ -93,77 +128,212 @@ class BoggleGui:
             self.found_words.config(state="disabled")
             self.tried_words.config(state="disabled")
             # creating new board
-            self.board = randomize_board()
+            self.new_board()
             # formatting points label back to 0
             self.points_score.config(text=0)
             # showing start button once again and changing game started to false
             self.setup_start_screen()
             self.game_started = False
 
-    def on_button_click(self, event):
-        # each button in the board is bind to <button-1>
-        button = event.widget
+    def new_board(self):
+        # randomizes a new board and drops the solutions of the old one
+        self.board = randomize_board(board_size=self.board_size)
+        self._solution = None
+        self._solution_board = None
+        # hints that were waiting belong to the old board
+        self._waiting_for_solution = []
+        self.set_hint_buttons_solving(False)
+
+    def board_key(self):
+        return tuple(tuple(row) for row in self.board)
+
+    def solve_board_in_background(self):
+        """Starts solving the current board on a worker thread, unless it is
+        already solved or being solved"""
+        board_key = self.board_key()
+        if self._solution_board == board_key or self._solving_board == board_key:
+            return
+        self.solution_cache_misses += 1
+        # a running poll loop keeps going until the new board is solved too
+        if self._solving_board is None:
+            self._root.after(50, self.poll_board_solution)
+        self._solving_board = board_key
+        board = [list(row) for row in self.board]
+        dictionary = self._dictionary
+
+        if self._solution_store is not None:
+            stored = self._solution_store.get(board)
+            if stored is not None:
+                # solved in an earlier game, no need to solve it again
+                solution = boggle_solution_store.stored_solution(board, stored)
+                self._solved_queue.put((board_key, solution, False))
+                return
+
+        def solve():
+            try:
+                solution = ex11_utils.solve_board(board, dictionary)
+            except Exception as e:
+                # the error goes to the Tk thread instead of the solution,
+                # so the hints that wait for it are not stuck forever
+                self._solved_queue.put((board_key, e, False))
+                return
+            self._solved_queue.put((board_key, solution, True))
+
+        threading.Thread(target=solve, daemon=True).start()
+
+    def poll_board_solution(self):
+        # collects finished solutions on the Tk thread and runs waiting hints
+        while not self._solved_queue.empty():
+            board_key, solution, solved = self._solved_queue.get()
+            if board_key == self._solving_board:
+                self._solving_board = None
+            if isinstance(solution, Exception):
+                # the solver failed: the waiting hints are dropped, and the
+                # next hint asked for tries to solve the board again
+                if board_key == self.board_key():
+                    self._waiting_for_solution = []
+                    self.set_hint_buttons_solving(False)
+                    self.status_label.config(
+                        text=f"Couldn't solve the board: {solution}"
+                    )
+                continue
+            # the store's connection belongs to this thread, not the solver's
+            if solved and self._solution_store is not None:
+                self._solution_store.put_solution(solution)
+            # a solution of an old board is not needed anymore
+            if board_key == self.board_key():
+                self._solution = solution
+                self._solution_board = board_key
+                if solved and ex11_utils.solver_stats_enabled():
+                    self.status_label.config(
+                        text=f"Board solved: {ex11_utils.solver_stats.last}"
+                    )
+        if self._solving_board is not None:
+            self._root.after(50, self.poll_board_solution)
+            return
+        if self._solution_board != self.board_key():
+            return
+        self.set_hint_buttons_solving(False)
+        waiting, self._waiting_for_solution = self._waiting_for_solution, []
+        for callback in waiting:
+            if self.game_started:
+                callback(self._solution)
+
+    def with_board_solution(self, callback):
+        """Calls the callback with all the words on the current board.
+        if the board is not solved yet, the callback is called once the
+        background solver is done and the hint buttons show it's working."""
+        if self._solution_board == self.board_key():
+            self.solution_cache_hits += 1
+            callback(self._solution)
+            return
+        self._waiting_for_solution.append(callback)
+        self.set_hint_buttons_solving(True)
+        self.solve_board_in_background()
+
+    def set_hint_buttons_solving(self, solving):
+        # disables the hint buttons while the board is being solved
+        if not hasattr(self, "reveal_word_btn"):
+            return
+        if solving:
+            self.reveal_word_btn.config(text="Solving…", state="disabled")
+            self.find_words_btn.config(text="Solving…", state="disabled")
+        else:
+            self.reveal_word_btn.config(text="Reveal word", state="normal")
+            self.find_words_btn.config(text="Word length", state="normal")
 
-        # check if the button is already selected or not neighboring
-        if not self.is_neighbor(button):
+    def on_cell_press(self, cell):
+        # the board calls it with the (row, col) of each pressed cell
+
+        # check if the cell is already selected or not neighboring
+        if not self.is_neighbor_cell(cell):
             return
-        # checking if useer selected same button twice in a row
-        if button in self.selected_buttons:
-            if self.selected_buttons and self.selected_buttons[-1] == button:
+        last_cell = self.last_selected_cell()
+        # checking if useer selected same cell twice in a row
+        if cell in self.selected_cells:
+            if last_cell == cell:
                 # if true, remove it
-                last_button = self.selected_buttons.pop()
-                last_button["state"] = "normal"
-                last_button["bg"] = ex11_utils.VERY_LIGHT_GREEN
+                self.selected_path.pop()
+                self.selected_cells.discard(cell)
             else:
                 return
 
         else:
-            # if user selected neighbor button, disable it and change color
-            self.selected_buttons.append(button)
-            button["state"] = "disabled"
-            button["bg"] = ex11_utils.LIGHT_GREEN
+            # if user selected neighbor cell, add it to the path
+            self.selected_path.append(cell)
+            self.selected_cells.add(cell)
 
-        # update words format label text and colors
+        # update words format label text and the colors of the cells that
+        # may have changed: the clicked one and around the old and new last
         self.update_words_format()
-        self.update_button_colors()
-
-    def is_neighbor(self, button):
-        #  check if the button is a neighbor of the last selected button
-        if not self.selected_buttons:
-            return True  # user can select any button at the start
-
-        last_button = self.selected_buttons[-1]
-        last_row, last_col = (
-            last_button.grid_info()["row"],
-            last_button.grid_info()["column"],
-        )
-        row, col = button.grid_info()["row"], button.grid_info()["column"]
-        # return true if last button and current button row and col
-        # is 1 or less (which mean they are neighbors), false otherwise
-        return abs(row - last_row) <= 1 and abs(col - last_col) <= 1
-
-    def update_button_colors(self):
-        # updates colors of buttons each time the user pressed
-        # a button in the board. (buttons are stored in a 2d list)
-        for row in range(self.board_size):
-            for col in range(self.board_size):
-                button = self.buttons[row][col]
-                if button in self.selected_buttons:
-                    button["bg"] = ex11_utils.LIGHT_GREEN
-                elif self.is_neighbor(button):
-                    button["bg"] = ex11_utils.VERY_LIGHT_GREEN
-                else:
-                    button["bg"] = ex11_utils.INTER_LIGHT
+        self.update_button_colors(
+            self.cells_around(last_cell)
+            | self.cells_around(self.last_selected_cell())
+            | {cell}
+        )
+
+    def on_cell_drag(self, cell):
+        # the board calls it with each new cell the mouse is dragged into.
+        # dragging back to the cell before the last one unselects the last,
+        # and dragging into a neighbor that is not selected selects it
+        if len(self.selected_path) >= 2 and cell == self.selected_path[-2]:
+            self.on_cell_press(self.selected_path[-1])
+        elif cell not in self.selected_cells:
+            self.on_cell_press(cell)
+
+    def last_selected_cell(self):
+        if not self.selected_path:
+            return None
+        return self.selected_path[-1]
+
+    def cells_around(self, cell):
+        """the cell and its neighbors. with no cell (nothing selected)
+        every cell can be selected, so it's all of the cells"""
+        rows, cols = len(self.board), len(self.board[0])
+        if cell is None:
+            return {(row, col) for row in range(rows) for col in range(cols)}
+        row, col = cell
+        adjacency = ex11_utils.get_adjacency(rows, cols)
+        return {cell} | {divmod(i, cols) for i in adjacency[row * cols + col]}
+
+    def is_neighbor_cell(self, cell):
+        last_cell = self.last_selected_cell()
+        if last_cell is None:
+            return True  # user can select any cell at the start
+        # the last cell itself counts, so it can be unselected
+        if cell == last_cell:
+            return True
+        # return true if the cell is one of the cells around the last one
+        cols = len(self.board[0])
+        adjacency = ex11_utils.get_adjacency(len(self.board), cols)
+        return (cell[0] * cols + cell[1]
+                in adjacency[last_cell[0] * cols + last_cell[1]])
+
+    def set_cell_color(self, cell, color):
+        # the board repaints only the cells that really changed color
+        self.board_view.set_cell_color(cell, color)
+
+    def update_button_colors(self, cells=None):
+        # updates colors of cells each time the user pressed
+        # a cell in the board (only the given cells, or all of them)
+        if cells is None:
+            cells = self.cells_around(None)
+        for cell in cells:
+            if cell in self.selected_cells:
+                self.set_cell_color(cell, ex11_utils.LIGHT_GREEN)
+            elif self.is_neighbor_cell(cell):
+                self.set_cell_color(cell, ex11_utils.VERY_LIGHT_GREEN)
+            else:
+                self.set_cell_color(cell, ex11_utils.INTER_LIGHT)
 
     def reset_buttons(self):
-        # for each button in the board, change it back to a default values
-        for row in range(self.board_size):
-            for col in range(self.board_size):
-                button = self.buttons[row][col]
-                button["state"] = "normal"
-                button["bg"] = "white"
-        # resetting the selected buttons the user pressed
-        self.selected_buttons = []
+        # change the board back to default values,
+        # only cells that aren't white are repainted
+        for cell in self.cells_around(None):
+            self.set_cell_color(cell, "white")
+        # resetting the selected cells the user pressed
+        self.selected_path = []
+        self.selected_cells = set()
 
     def reset_board(self):
         """run when user clicked the check button.
@@ -212,16 +382,23 @@ class BoggleGui:
             self.words_format.config(text="")
 
     def update_words_format(self):
-        # iterating over all the selected buttons and adding the letters
-        # associated with each button to a variable word
-        word = "".join(button.cget("text") for button in self.selected_buttons)
+        # iterating over all the selected cells and adding the letters
+        # on each cell to a variable word
+        word = "".join(self.board[row][col] for row, col in self.selected_path)
         self.words_format.config(text=word)
 
     def set_title(self, title):
         self._root.title(title)
 
     def run(self) -> None:
-        self._root.mainloop()
+        try:
+            self._root.mainloop()
+        finally:
+            # the window is closed, so the used times the store still
+            # holds are written now
+            if self._solution_store is not None:
+                self._solution_store.close()
+                self._solution_store = None
 
     "main screen with all the widgets and accessories"
 
@@ -292,44 +469,23 @@ class BoggleGui:
         return word in self._dictionary
 
     def set_board_frame(self):
-        # Create the boggle board
-        self.board_frame = Frame(
-            self.center_main,
-            padx=10,
-            pady=10,
-            bg=ex11_utils.VERY_DARK_GREEN,
-        )
+        # Create the boggle board once, and after that only show
+        # the letters of the new board on it
+        if not hasattr(self, "board_frame"):
+            self.board_frame = Frame(
+                self.center_main,
+                padx=10,
+                pady=10,
+                bg=ex11_utils.VERY_DARK_GREEN,
+            )
+            # all the cells are tiles on a single canvas
+            self.board_view = BoardCanvas(
+                self.board_frame, self.on_cell_press, self.on_cell_drag
+            )
+            self.board_view.canvas.pack()
+        self.board_view.show_board(self.board)
         self.board_frame.pack(expand=True, pady=(40, 0))
 
-        # saving each button of the board to a 2d list
-        self.buttons = []
-        for row in range(self.board_size):
-            button_row = []
-            for col in range(self.board_size):
-                letter = self.board[row][col]
-                button = Button(
-                    self.board_frame,
-                    text=letter,
-                    font=("Comic Sans MS", 16),
-                    fg=ex11_utils.VERY_DARK_GREEN,
-                    relief="raised",
-                    width=3,
-                    height=1,
-                )
-                button.grid(
-                    row=row,
-                    column=col,
-                    padx=5,
-                    pady=5,
-                    ipadx=12,
-                    ipady=6,
-                )
-                button.bind("<Button-1>", self.on_button_click)
-                button["state"] = "normal"
-                button["disabledforeground"] = "black"
-                button_row.append(button)
-            self.buttons.append(button_row)
-
     def find_words_of_length_n(self):
         if self.game_started:
             self.reset_buttons()
@@ -339,25 +495,9 @@ class BoggleGui:
                 "Please enter the length of the word you would like to find:",
             )
             if n is not None and n > 2:
-                valid_paths = ex11_utils.find_length_n_words(
-                    n, self.board, self._dictionary
+                self.with_board_solution(
+                    lambda solution: self.show_word_of_length_n(n, solution)
                 )
-                if valid_paths != []:
-                    selected_word_and_path = self.selected_word_and_path(valid_paths)
-                    if selected_word_and_path != None:
-                        word, selected_path = selected_word_and_path
-                        if word and selected_path:
-                            for row, col in selected_path:
-                                button = self.buttons[row][col]
-                                button["bg"] = ex11_utils.DARKER_YELLOW
-                            self.words_format.config(text=word)
-                else:
-                    self.status_label.config(
-                        text=(f"No {n}-letter-word found on this board.")
-                    )
-                    self._root.after(
-                        3000, lambda: self.status_label.config(text="")
-                    )  # Clear message after 3 seconds
             else:
                 self.status_label.config(
                     text="The length of the word should be \n at least 3 letters!"
@@ -366,6 +506,25 @@ class BoggleGui:
                     3000, lambda: self.status_label.config(text="")
                 )  # Clear message after 3 seconds
 
+    def show_word_of_length_n(self, n, solution):
+        # highlights a random word of length n from the board solution
+        valid_paths = solution.words_of_length(n)
+        if valid_paths != []:
+            selected_word_and_path = self.selected_word_and_path(valid_paths)
+            if selected_word_and_path != None:
+                word, selected_path = selected_word_and_path
+                if word and selected_path:
+                    for row, col in selected_path:
+                        self.set_cell_color((row, col), ex11_utils.DARKER_YELLOW)
+                    self.words_format.config(text=word)
+        else:
+            self.status_label.config(
+                text=(f"No {n}-letter-word found on this board.")
+            )
+            self._root.after(
+                3000, lambda: self.status_label.config(text="")
+            )  # Clear message after 3 seconds
+
     def set_bottom_buttons(self):
         # Create the buttons on the bottom of the page
         self.end_game_btn = Button(
@@ -438,19 +597,24 @@ class BoggleGui:
         # Reveal a word on the board that is not already found
         if self.game_started:
             self.reset_buttons()
-            valid_paths = ex11_utils.max_score_paths(self.board, self._dictionary)
+            # waits for the background solver if the board isn't solved yet,
+            # the search never runs on the Tk thread
+            self.with_board_solution(self.show_revealed_word)
 
-            if valid_paths:
-                selected_word_result = self.selected_word_and_path(valid_paths)
-                if selected_word_result:
-                    word, selected_path = selected_word_result
-                    # Highlight the corresponding cells on the board
-                    for row, col in selected_path:
-                        button = self.buttons[row][col]
-                        button["bg"] = ex11_utils.DARKER_YELLOW
+    def show_revealed_word(self, solution):
+        # highlights a random word from the board solution
+        valid_paths = solution.best_paths()
 
-                    # Update the word_format label
-                    self.words_format.config(text=word)
+        if valid_paths:
+            selected_word_result = self.selected_word_and_path(valid_paths)
+            if selected_word_result:
+                word, selected_path = selected_word_result
+                # Highlight the corresponding cells on the board
+                for row, col in selected_path:
+                    self.set_cell_color((row, col), ex11_utils.DARKER_YELLOW)
+
+                # Update the word_format label
+                self.words_format.config(text=word)
 
     def set_points_frame(self):
         self.frame = Frame(self.top)
@@ -537,58 +701,68 @@ class BoggleGui:
         )
         self.label.place(relx=0.5, rely=0.5, anchor=CENTER)
 
+    def time_left(self):
+        # seconds until the end of the round, from the monotonic clock
+        return self._round_deadline - time.monotonic()
+
     def update_timer(self):
-        if self.remaining_time >= 0 and self.game_started:
-            minutes = self.remaining_time // 60
-            seconds = self.remaining_time % 60
-
-            self.time_widget.delete("all")
-
-            # Change color to red when 20 seconds or less are remaining
-            if self.remaining_time <= 20:
-                self.draw_timer_arc(
-                    40,
-                    40,
-                    35,
-                    0,
-                    360 - (self.remaining_time / 180) * 360,
-                    ex11_utils.LIGHT_RED,
-                )
-            else:
-                self.draw_timer_arc(
-                    40,
-                    40,
-                    35,
-                    0,
-                    360 - (self.remaining_time / 180) * 360,
-                    ex11_utils.INTER_LIGHT,
-                )
-            self.time_widget.create_text(
-                40,
-                40,
-                text=f"{minutes:02}:{seconds:02}",
-                font=("Comic Sans MS", 18),
-                fill=ex11_utils.VERY_DARK_GREEN,
-            )
-            self.remaining_time -= 1
-            self._root.after(1000, self.update_timer)
-        else:
+        self._timer_job = None
+        if not self.game_started:
+            return
+        left = self.time_left()
+        if left <= 0:
+            # the round is over, so the clock ends on 00:00 (and not on the
+            # 00:01 it showed during the last second)
+            self.remaining_time = 0
+            self.draw_timer()
             self.reset_game()
+            return
+        # the timer shows the seconds rounded up, so it reaches 00:00
+        # only when the round is over
+        shown = math.ceil(left)
+        if shown != self.remaining_time:
+            self.remaining_time = shown
+            self.draw_timer()
+        # waking up when the shown second changes, and if the mainloop was
+        # busy meanwhile the clock still says how much time is really left
+        self._timer_job = self._root.after(
+            int((left - (shown - 1)) * 1000) + 1, self.update_timer
+        )
+
+    def draw_timer(self):
+        minutes = self.remaining_time // 60
+        seconds = self.remaining_time % 60
+        # Change color to red when 20 seconds or less are remaining
+        if self.remaining_time <= 20:
+            color = ex11_utils.LIGHT_RED
+        else:
+            color = ex11_utils.INTER_LIGHT
+        self.draw_timer_arc(
+            40,
+            40,
+            35,
+            0,
+            360 - (self.remaining_time / ROUND_SECONDS) * 360,
+            color,
+        )
+        self.time_widget.itemconfigure(
+            self.timer_text, text=f"{minutes:02}:{seconds:02}"
+        )
 
     def draw_timer_arc(self, x, y, r, start_deg, end_deg, color):
-        # Draw the timer circle and fill it
+        # moves the timer's arc item and fills it, instead of drawing a new one
         if start_deg == end_deg:
-            return  # skip the drawing when start_deg is equal to end_deg
-        self.time_widget.create_arc(
-            x - r,
-            y - r,
-            x + r,
-            y + r,
+            # hide the arc when start_deg is equal to end_deg
+            self.time_widget.itemconfigure(self.timer_arc, state="hidden")
+            return
+        self.time_widget.coords(self.timer_arc, x - r, y - r, x + r, y + r)
+        self.time_widget.itemconfigure(
+            self.timer_arc,
             start=start_deg,
             extent=end_deg - start_deg,
             fill=color,
             outline=color,
-            width=2,
+            state="normal",
         )
 
     def set_time_widget(self):
@@ -602,10 +776,22 @@ class BoggleGui:
         )
         self.time_widget.place(relx=0.85, rely=0.05)
         self.time_widget.create_oval(0, 0, 80, 80, width=2, outline="")
+        # the arc and the text are made once and then only changed
+        self.timer_arc = self.time_widget.create_arc(
+            5, 5, 75, 75, start=0, extent=1, width=2, state="hidden"
+        )
+        self.timer_text = self.time_widget.create_text(
+            40,
+            40,
+            text="",
+            font=("Comic Sans MS", 18),
+            fill=ex11_utils.VERY_DARK_GREEN,
+        )
 
     def display_game_results(self):
         # creates a frame to hold the results
         results_frame = Frame(self.center_main, bg=ex11_utils.LIGHT_GREEN)
+        self.results_frame = results_frame  # removed when a new game starts
         results_frame.place(relx=0.2, rely=0.3, relwidth=0.6, relheight=0.4)
 
         # create a label to display the score
@@ -1,5 +1,12 @@
 import math
-from typing import List, Tuple, Iterable, Optional, Any
+import os
+import random
+import sys
+import time
+from functools import lru_cache
+from itertools import islice
+from bisect import bisect_left
+from typing import List, Tuple, Iterable, Iterator, Optional, Any, Dict
 
 
 Board = List[List[str]]
@@ -19,6 +26,82 @@ LIGHT_RED = "#ff6767"
 # GUI constants
 SPLIT = 0.15
 
+# upper bound character used for finding the end of a prefix range
+PREFIX_END = "\uffff"
+
+
+class PrefixIndex:
+    """Sorted index of the dictionary words that answers both
+    "is this a word" and "is this the prefix of some word" questions.
+    The solver uses it to abandon paths that can never become a word."""
+
+    def __init__(self, words: Iterable[str]):
+        self.words = sorted(set(words))
+
+    @classmethod
+    def from_sorted(cls, words: List[str]) -> "PrefixIndex":
+        """Index of words that are already sorted and without repeats,
+        which skips the sorting (the list is used as is, not copied)"""
+        index = cls.__new__(cls)
+        index.words = words
+        return index
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __contains__(self, word: str) -> bool:
+        i = bisect_left(self.words, word)
+        return i < len(self.words) and self.words[i] == word
+
+    def prefix_range(self, prefix: str, lo: int = 0, hi: Optional[int] = None):
+        """Returns the (lo, hi) range of words that start with the prefix.
+        lo and hi may be the range of a shorter prefix of the same string,
+        which keeps the search small while a path grows letter by letter.
+        An empty range (lo == hi) means no word starts with the prefix."""
+        if hi is None:
+            hi = len(self.words)
+        lo = bisect_left(self.words, prefix, lo, hi)
+        hi = bisect_left(self.words, prefix + PREFIX_END, lo, hi)
+        return lo, hi
+
+    def has_prefix(self, prefix: str) -> bool:
+        lo, hi = self.prefix_range(prefix)
+        return lo < hi
+
+
+# (words, index) of the last words collection that an index was built for.
+# it is replaced as a whole, so a thread never sees the index of other words
+_index_cache: Tuple[Any, Optional[PrefixIndex]] = (None, None)
+
+
+def get_prefix_index(words: Iterable[str]) -> PrefixIndex:
+    """Returns the prefix index of the given words. The index is built once
+    and reused for as long as the same words object is passed in.
+    The cache goes by the object only, so words must not be changed after
+    it was passed in (pass a new object instead, or a PrefixIndex)."""
+    global _index_cache
+    if isinstance(words, PrefixIndex):
+        return words
+    cached_words, index = _index_cache
+    if cached_words is not words:
+        index = PrefixIndex(words)
+        _index_cache = (words, index)
+    return index
+
+
+@lru_cache(maxsize=None)
+def get_adjacency(rows: int, cols: int) -> Tuple[Tuple[int, ...], ...]:
+    """Returns the neighbors table of a board with the given shape.
+    cells are numbered row by row (cell = row * cols + col) and the table
+    holds, for every cell, the numbers of the cells next to it.
+    The table is built once for each board shape and then shared."""
+    board = [[""] * cols for _ in range(rows)]
+    return tuple(
+        tuple(y * cols + x for y, x in find_neighboring_values(board, r, c))
+        for r in range(rows)
+        for c in range(cols)
+    )
+
 
 def is_valid_path(board: Board, path: Path, words: Iterable[str]) -> Optional[str]:
     """Function that checks if a given path is considered valid on the board.
@@ -27,30 +110,90 @@ def is_valid_path(board: Board, path: Path, words: Iterable[str]) -> Optional[st
     :param path: List of coordinates on the board.
     :param words: Iterable object that contains all the possible words in the game.
     """
-    if is_same_cube(path):  # if there is same positions in path
+    word = path_word(board, path)
+    if word is None:
         return None
-    # if next pos is further than 1 cell (from all the 8 possible moves)
-    if not legal_move(path):
-        return None
-    word = ""  # variable to hold the word represented as a path
-    for pos in path:  # iterate over all the path to extricate word
-        if 0 <= pos[0] < len(board) and 0 <= pos[1] < len(board[0]):
-            word += board[pos[0]][pos[1]]
-        else:
-            return None
     if word in words:  # check if the word is presented in dictionary
         return word
     else:
         return None
 
 
+def path_word(board: Board, path: Path) -> Optional[str]:
+    """Checks in a single pass over the path that it stays on the board,
+    moves only to one of the 8 cells around the previous cell and never
+    visits a cell twice. Returns the word formed by the path, or None if
+    the path is illegal (the word is not looked up in any dictionary)."""
+    rows, cols = len(board), len(board[0])
+    adjacency = get_adjacency(rows, cols)
+    visited = 0  # bit number cell is set once the cell is in the path
+    prev_cell = -1
+    word = ""
+    for y, x in path:
+        if not (0 <= y < rows and 0 <= x < cols):
+            return None
+        cell = y * cols + x
+        if visited >> cell & 1:
+            return None
+        if prev_cell >= 0 and cell not in adjacency[prev_cell]:
+            return None
+        visited |= 1 << cell
+        prev_cell = cell
+        word += board[y][x]
+    return word
+
+
+def validate_paths(board: Board, paths: Iterable[Path],
+                   words: Iterable[str]) -> List[Optional[str]]:
+    """Function that checks many paths against the same board, like
+    is_valid_path does for one path. Returns a list with the word of every
+    valid path and None for every invalid one, in the order of the paths.
+    :param board: 2d list representing a boggle board.
+    :param paths: Iterable object of paths (lists of coordinates on the board).
+    :param words: Iterable object that contains all the possible words in the game.
+    """
+    rows, cols = len(board), len(board[0])
+    # the board and its neighbors table are prepared once for all the paths,
+    # with the legal moves of every cell as a bitmask of cells
+    letters = [letter for row in board for letter in row]
+    moves = [sum(1 << neighbor for neighbor in neighbors)
+             for neighbors in get_adjacency(rows, cols)]
+    in_dict: Dict[str, bool] = {}  # players send the same words many times
+    results: List[Optional[str]] = []
+    for path in paths:
+        # same checks as path_word: on the board, next to the last cell
+        # (any cell for the first one) and not visited before
+        visited = 0
+        allowed = -1
+        word = ""
+        for y, x in path:
+            if not (0 <= y < rows and 0 <= x < cols):
+                word = None
+                break
+            cell = y * cols + x
+            bit = 1 << cell
+            if visited & bit or not allowed & bit:
+                word = None
+                break
+            visited |= bit
+            allowed = moves[cell]
+            word += letters[cell]
+        if word is not None:
+            if word not in in_dict:
+                in_dict[word] = word in words
+            if not in_dict[word]:
+                word = None
+        results.append(word)
+    return results
+
+
 def find_length_n_paths(n: int, board: Board, words: Iterable[str]) -> List[Path]:
     """function that finds all the possible paths of length n on a given board.
     :param n: an integer representing the length of the path.
     :param board: 2d list representing a boggle board.
     :param words: Iterable object that contains all the possible words in the game.
     """
-    return find_paths(board, words, n)
+    return solve_board(board, words).paths_of_length(n)
 
 
 def find_length_n_words(n: int, board: Board, words: Iterable[str]) -> List[Path]:
@@ -59,7 +202,7 @@ def find_length_n_words(n: int, board: Board, words: Iterable[str]) -> List[Path
     :param board: 2d list representing a boggle board.
     :param words: Iterable object that contains all the possible words in the game.
     """
-    return find_paths(board, words, n)
+    return solve_board(board, words).words_of_length(n)
 
 
 def max_score_paths(board: Board, words: Iterable[str]) -> List[Path]:
@@ -67,7 +210,90 @@ def max_score_paths(board: Board, words: Iterable[str]) -> List[Path]:
     :param board: 2d list representing a boggle board.
     :param words: Iterable object that contains all the possible words in the game.
     """
-    return find_paths(board, words, None, score=True)
+    return list(find_best_paths(board, words).values())
+
+
+def find_best_paths(board: Board, words: Iterable[str]) -> Dict[str, Path]:
+    """Function that finds every word on the board and keeps a single path
+    for each one. Finding a word scores len(word) ** 2 whatever path forms
+    it, so when a few paths form the same word the one with the most cells
+    is kept (a word with a QU cell can have both longer and shorter paths).
+    :param board: 2d list representing a boggle board.
+    :param words: Iterable object that contains all the possible words in the game.
+    """
+    best: Dict[str, Path] = {}
+
+    def found(word, path):
+        if word not in best or len(path) > len(best[word]):
+            best[word] = path
+
+    search_board(board, get_prefix_index(words), found)
+    return best
+
+
+def max_score(board: Board, words: Iterable[str]) -> int:
+    """Function that returns the highest score possible on the board,
+    which is the score of finding every word on it.
+    :param board: 2d list representing a boggle board.
+    :param words: Iterable object that contains all the possible words in the game.
+    """
+    return sum(len(word) ** 2 for word in find_best_paths(board, words))
+
+
+class BoardSolution:
+    """Every word that can be formed on a board, together with all the
+    paths that form it. Built once by solve_board and then used to answer
+    all the path, length and score questions about that board."""
+
+    def __init__(self, board: Board, word_paths: Dict[str, List[Path]]):
+        self.board = board
+        self.word_paths = word_paths
+
+    @property
+    def words(self) -> List[str]:
+        return sorted(self.word_paths)
+
+    @property
+    def length_histogram(self) -> Dict[int, int]:
+        """number of different words found for each word length"""
+        histogram: Dict[int, int] = {}
+        for word in self.word_paths:
+            histogram[len(word)] = histogram.get(len(word), 0) + 1
+        return histogram
+
+    @property
+    def max_score(self) -> int:
+        """score of finding every word on the board (len(word) ** 2 each)"""
+        return sum(len(word) ** 2 for word in self.word_paths)
+
+    def paths_of_length(self, n: int) -> List[Path]:
+        """all the paths of n cells that form a word"""
+        return [path for paths in self.word_paths.values()
+                for path in paths if len(path) == n]
+
+    def words_of_length(self, n: int) -> List[Path]:
+        """all the paths that form a word of n letters"""
+        return [path for word, paths in self.word_paths.items()
+                if len(word) == n for path in paths]
+
+    def best_paths(self) -> List[Path]:
+        """one path for each word, the longest one when there are a few"""
+        return [max(paths, key=len) for paths in self.word_paths.values()]
+
+
+def solve_board(board: Board, words: Iterable[str]) -> BoardSolution:
+    """Function that walks the board once and finds every word on it
+    with all the paths that form it.
+    :param board: 2d list representing a boggle board.
+    :param words: Iterable object that contains all the possible words in the game.
+    """
+    word_paths: Dict[str, List[Path]] = {}
+
+    def found(word, path):
+        word_paths.setdefault(word, []).append(path)
+
+    search_board(board, get_prefix_index(words), found)
+    return BoardSolution(board, word_paths)
 
 
 def find_paths(board, words, n, score=False):
@@ -76,52 +302,258 @@ def find_paths(board, words, n, score=False):
     :param board: 2d list representing a boggle board.
     :param words: Iterable object that contains all the possible words in the game.
     """
-    ans = []
-    words_dict = {}
-
-    def find_recursive_path(path, y, x):
-        # if the function needs to find paths that maximize the score
-        if score:
-            word_length = words_length(path, board)
-            if word_length >= 3:
-                prefix = create_word(path, board)
-                if not is_word_in_dict(prefix, words):
-                    return
-                else:
-                    if is_word_in_dict(prefix, words):
-                        if prefix in words_dict and len(path) > len(words_dict[prefix]):
-                            ans.remove(words[prefix])
-                            ans.append(path)
-                            words_dict[prefix] = path
-                        else:
-                            ans.append(path)
-                            words_dict[prefix] = path
+    solution = solve_board(board, words)
+    if score:
+        return solution.best_paths()
+    return solution.paths_of_length(n)
+
+
+def iter_paths(board: Board, words: Iterable[str], n: Optional[int] = None,
+               rng: Optional[random.Random] = None) -> Iterator[Tuple[str, Path]]:
+    """Generator version of find_paths that yields (word, path) pairs as
+    soon as they are found, so the caller can stop whenever it has enough.
+    :param board: 2d list representing a boggle board.
+    :param words: Iterable object that contains all the possible words in the game.
+    :param n: if given, only paths of n cells are yielded.
+    :param rng: if given, a random.Random used for walking the board in a
+    random order (start cells and neighbors are shuffled once per call).
+    """
+    index = get_prefix_index(words)
+    if _stats_enabled:
+        return _iter_paths_with_stats(board, index, n, rng)
+    return _iter_paths(board, index, n, rng)
+
+
+def _iter_paths(board, index, n, rng):
+    cols = len(board[0])
+    letters = [letter for row in board for letter in row]
+    neighbors = get_adjacency(len(board), cols)
+    starts = list(range(len(letters)))
+    if rng is not None:
+        rng.shuffle(starts)
+        neighbors = [rng.sample(cell_neighbors, len(cell_neighbors))
+                     for cell_neighbors in neighbors]
+
+    for start in starts:
+        # same walk as search_board, with an explicit stack instead of
+        # recursion: one (neighbors iterator, word, lo, hi) frame per cell
+        # of the path, and pending holds the next cell to step into
+        cells, visited, stack = [], 0, []
+        pending = (start, "", 0, len(index))
+        while pending is not None or stack:
+            if pending is not None:
+                cell, word, lo, hi = pending
+                pending = None
+                word += letters[cell]
+                # abandon the path if no word in the dictionary starts with it
+                lo, hi = index.prefix_range(word, lo, hi)
+                if lo == hi:
+                    continue
+                cells.append(cell)
+                if index.words[lo] == word and (n is None or len(cells) == n):
+                    yield word, [divmod(i, cols) for i in cells]
+                if n is not None and len(cells) >= n:
+                    cells.pop()
+                    continue
+                visited |= 1 << cell
+                stack.append((iter(neighbors[cell]), word, lo, hi))
+                continue
+            moves, word, lo, hi = stack[-1]
+            for neighbor in moves:
+                if not visited >> neighbor & 1:
+                    pending = (neighbor, word, lo, hi)
+                    break
+            else:
+                stack.pop()
+                visited &= ~(1 << cells.pop())
+
+
+def first_paths(board: Board, words: Iterable[str], k: int,
+                n: Optional[int] = None,
+                rng: Optional[random.Random] = None) -> List[Tuple[str, Path]]:
+    """Returns the first k (word, path) pairs found by iter_paths,
+    without walking the rest of the board."""
+    return list(islice(iter_paths(board, words, n, rng), k))
+
+
+def search_board(board: Board, index: PrefixIndex, found) -> None:
+    """Walks every path on the board that is a prefix of a word in the index
+    and calls found(word, path) for every path that forms a word.
+    Cells are numbered row by row, the visited cells of a path are kept as
+    bits of an integer and the word grows one cell at a time, so a path
+    list is only created for the paths that form words."""
+    search = _search_board_with_stats if _stats_enabled else _search_board
+    # a thread that is profiled already has the search in its own profile
+    if _profiler is not None and not profiler_active():
+        try:
+            _profiler.enable()
+        except ValueError:
+            # another profiler started meanwhile, it can't be joined
+            search(board, index, found)
+            return
+        try:
+            search(board, index, found)
+        finally:
+            _profiler.disable()
+    else:
+        search(board, index, found)
+
+
+def _search_board(board, index, found):
+    cols = len(board[0])
+    letters = [letter for row in board for letter in row]
+    neighbors = get_adjacency(len(board), cols)
+    cells = []  # the cells of the current path, as a stack
+
+    def search_cell(cell, visited, word, lo, hi):
+        word += letters[cell]
+        # abandon the path if no word in the dictionary starts with it
+        lo, hi = index.prefix_range(word, lo, hi)
+        if lo == hi:
+            return
+        cells.append(cell)
+        visited |= 1 << cell
+        # the first word of the range is the path's word itself if it exists
+        if index.words[lo] == word:
+            found(word, [divmod(i, cols) for i in cells])
+        for neighbor in neighbors[cell]:
+            if not visited >> neighbor & 1:
+                search_cell(neighbor, visited, word, lo, hi)
+        cells.pop()
+
+    for cell in range(len(letters)):
+        search_cell(cell, 0, "", 0, len(index))
+
+
+# solver instrumentation, off unless the environment variable is set or
+# set_solver_stats(True) is called. when it is off the solver runs exactly
+# as without it, the only cost is checking the flag once per call.
+STATS_ENV_VAR = "BOGGLE_SOLVER_STATS"
+_stats_enabled = os.environ.get(STATS_ENV_VAR, "") not in ("", "0")
+_profiler = None
+
+
+class SolverStats:
+    """What the solver did in one call, or in all the calls together"""
+
+    def __init__(self):
+        self.calls = 0
+        self.nodes = 0  # cells stepped into
+        self.prunes = 0  # paths abandoned because no word starts with them
+        self.lookups = 0  # paths checked against the dictionary for a word
+        self.paths = 0  # paths found that form words
+        self.seconds = 0.0
+        self.last: Optional[SolverStats] = None  # the last call, in totals
+
+    def add(self, call: "SolverStats") -> None:
+        self.calls += call.calls
+        self.nodes += call.nodes
+        self.prunes += call.prunes
+        self.lookups += call.lookups
+        self.paths += call.paths
+        self.seconds += call.seconds
+        self.last = call
+
+    def reset(self) -> None:
+        self.__init__()
+
+    def as_dict(self) -> Dict[str, float]:
+        return {"calls": self.calls, "nodes": self.nodes, "prunes": self.prunes,
+                "lookups": self.lookups, "paths": self.paths,
+                "seconds": self.seconds}
+
+    def __str__(self):
+        return (f"{self.calls} solver calls: {self.nodes} nodes, "
+                f"{self.prunes} pruned, {self.lookups} lookups, "
+                f"{self.paths} paths, {self.seconds * 1000:.1f}ms")
+
+
+# totals of every instrumented solver call
+solver_stats = SolverStats()
+
+
+def set_solver_stats(enabled: bool) -> None:
+    """Turns the solver instrumentation (solver_stats) on or off"""
+    global _stats_enabled
+    _stats_enabled = enabled
+
+
+def solver_stats_enabled() -> bool:
+    return _stats_enabled
+
+
+def profiler_active() -> bool:
+    """Whether this thread is profiled already. Since python 3.12 cProfile
+    profiles all the threads at once (through sys.monitoring) and doesn't
+    show in sys.getprofile(), before that only the thread that started it."""
+    if hasattr(sys, "monitoring"):
+        return sys.monitoring.get_tool(sys.monitoring.PROFILER_ID) is not None
+    return sys.getprofile() is not None
+
+
+def set_solver_profiler(profiler) -> None:
+    """Runs every search_board call under the given cProfile.Profile
+    (None stops it), on threads that aren't profiled already. Useful
+    because the GUI solves on another thread, which a profiler of the
+    main thread doesn't see."""
+    global _profiler
+    _profiler = profiler
+
+
+class _CountingIndex:
+    # a prefix index that counts the solver's use of it into stats
+
+    def __init__(self, index: PrefixIndex, stats: SolverStats):
+        self.index = index
+        self.stats = stats
+        self.words = index.words
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def prefix_range(self, prefix: str, lo: int = 0, hi: Optional[int] = None):
+        self.stats.nodes += 1
+        lo, hi = self.index.prefix_range(prefix, lo, hi)
+        if lo == hi:
+            self.stats.prunes += 1
         else:
-            if len(path) == n:
-                word = create_word(path, board)
-                if is_word_in_dict(word, words):
-                    ans.append(path)
-                return
-
-        neighbors = find_neighboring_values(board, y, x)
-        for neighbor in neighbors:
-            if neighbor not in path:
-                new_path = path.copy()
-                new_path.append(neighbor)
-                new_y, new_x = neighbor
-                # find all possible paths from this cell
-                find_recursive_path(new_path, new_y, new_x)
-
-    # iterates through each cell
-    for r in range(len(board)):
-        for c in range(len(board[0])):
-            sub_path = [(r, c)]
-            # find all possible paths from this cell
-            find_recursive_path(sub_path, r, c)
+            self.stats.lookups += 1
+        return lo, hi
 
-    return ans
+
+def _search_board_with_stats(board, index, found):
+    call = SolverStats()
+    call.calls = 1
+
+    def counted_found(word, path):
+        call.paths += 1
+        found(word, path)
+
+    start = time.perf_counter()
+    try:
+        _search_board(board, _CountingIndex(index, call), counted_found)
+    finally:
+        call.seconds = time.perf_counter() - start
+        solver_stats.add(call)
+
+
+def _iter_paths_with_stats(board, index, n, rng):
+    # seconds is the time the generator was open, including the caller's time
+    call = SolverStats()
+    call.calls = 1
+    start = time.perf_counter()
+    try:
+        for item in _iter_paths(board, _CountingIndex(index, call), n, rng):
+            call.paths += 1
+            yield item
+    finally:
+        call.seconds = time.perf_counter() - start
+        solver_stats.add(call)
 
 
+# the helpers below are not used by the solver anymore (path_word and
+# search_board walk the adjacency table instead), and are kept unchanged
+# for code that still calls them
 def words_length(path, board):
     length = 0
     for pos in path: